@@ -1,38 +1,49 @@
 import pandas as pd
 import networkx as nx
-import community as louvain  # pip install python-louvain
-from collections import Counter, defaultdict
+from collections import Counter
 import numpy as np
+import time
+from cooccurrence import ASSOCIATION_MEASURES, check_similarity_weight, cooccurrence_edges, parallel_cooccurrence_edges, stream_cooccurrence_edges
+from entity_vocab import EntityVocabulary
+from periods import PERIOD_DATES
+from temporal_store import TemporalEdgeStore
+from csr_graph import CSRGraph
+from multiseed import label_modularity, run_louvain_seeds
+from consensus import consensus_clustering
+from warm_start import align_to_previous, initial_labels
+from dendrogram import CommunityDendrogram
+from brokerage import brokerage_table
+from kcore import onion_decomposition
+from spectral import spectral_centralities
+from partition_similarity import mean_pairwise_scores, pairwise_similarity, save_similarity_matrices
+from cache import MetricsCache
 
-def create_edges_from_nodes(nodes_file_path, edges_file_path):
+def create_edges_from_nodes(nodes_file_path, edges_file_path, vocab=None,
+                            chunksize=None, memory_limit_mb=512, n_workers=None):
     """
-    Create edges from nodes based on entity co-occurrence within articles
+    Create edges from nodes based on entity co-occurrence within articles.
+    With chunksize set, the nodes file is streamed in article-aligned chunks
+    and partial counts are spilled to disk above memory_limit_mb. With
+    n_workers > 1, pairs are counted on article shards in a process pool.
+    
+    The in-memory paths also write the normalized association weights
+    (ppmi, jaccard, cosine, lift, hypergeom_p) as extra edge columns.
     """
-    df = pd.read_csv(nodes_file_path)
+    if chunksize is not None:
+        stream_cooccurrence_edges(nodes_file_path, edges_file_path, chunksize,
+                                  memory_limit_mb, vocab=vocab)
+        return pd.read_csv(edges_file_path)
     
-    # Group entities by Article_ID to find co-occurrences
-    grouped = df.groupby('Article_ID')['Entity'].apply(list)
+    df = pd.read_csv(nodes_file_path)
     
-    # Create edges based on co-occurrence of entities within the same article
-    edge_weights = defaultdict(int)
-    
-    for entities in grouped:
-        # Create all unique pairs of entities in the article (undirected edges)
-        unique_entities = list(set(entities))
-        n = len(unique_entities)
-        
-        # Generate all possible pairs
-        for i in range(n):
-            for j in range(i+1, n):
-                # Sort to ensure consistent edge representation
-                edge = tuple(sorted([unique_entities[i], unique_entities[j]]))
-                edge_weights[edge] += 1
-    
-    # Convert to DataFrame
-    edges_df = pd.DataFrame([
-        {'src': src, 'dst': dst, 'weight': weight} 
-        for (src, dst), weight in edge_weights.items()
-    ])
+    # Co-occurrence weights are the upper triangle of AᵀA, where A is the
+    # sparse article x entity incidence matrix
+    if n_workers is not None and n_workers > 1:
+        edges_df = parallel_cooccurrence_edges(df, n_workers, 'Article_ID', 'Entity',
+                                               vocab=vocab, associations=True)
+    else:
+        edges_df = cooccurrence_edges(df, 'Article_ID', 'Entity', vocab=vocab,
+                                      associations=True)
     
     # Save edges to CSV
     edges_df.to_csv(edges_file_path, index=False)
@@ -40,15 +51,70 @@ def create_edges_from_nodes(nodes_file_path, edges_file_path):
     
     return edges_df
 
-def run_robust_louvain(edges_csv_path, output_prefix=""):
+def detect_robust_partition(graph, n_runs=10, resolution=1.0, n_workers=None, method='louvain',
+                            initial=None):
+    """
+    The n_runs seeded runs of a CSRGraph and their consensus, as arrays:
+    runs, modularities, consensus labels and per-node confidence, plus the
+    seconds the runs took
+    """
+    start = time.perf_counter()
+    runs, modularities = run_louvain_seeds(graph, n_runs, resolution, n_workers,
+                                           method=method, initial=initial)
+    run_seconds = time.perf_counter() - start
+    
+    consensus_labels, confidence = consensus_clustering(graph, runs, n_workers=n_workers,
+                                                        method=method, resolution=resolution)
+    return {
+        'runs': runs,
+        'modularities': modularities,
+        'consensus_labels': consensus_labels,
+        'confidence': confidence,
+        'run_seconds': run_seconds
+    }
+
+def run_robust_louvain(edges_csv_path, output_prefix="", vocab=None, weight='weight',
+                       n_runs=10, n_workers=None, method='louvain', initial_partition=None,
+                       resolution=1.0, save_dendrogram=True, cache=None,
+                       max_community_id=None):
     """
-    Run robust Louvain community detection with stability evaluation
+    Run robust Louvain community detection with stability evaluation.
+    weight selects the edge column to cluster on: the raw co-occurrence
+    count or one of the association measures (ppmi, jaccard, cosine, lift).
+    The n_runs seeds run across a pool of n_workers processes; method picks
+    the community detection backend (louvain, leiden, networkx) and
+    resolution the granularity (see resolution_sweep.py for picking one).
+    
+    initial_partition ({node: community}, e.g. the previous period's result)
+    warm-starts every run from the surviving nodes' communities and keeps
+    their community ids. New communities get ids above max_community_id
+    (the largest id used in any earlier window; by default the largest id
+    of initial_partition), so retired ids are never reused. A cold start is
+    timed alongside for comparison and reported in G.graph['warm_start'].
+    
+    With save_dendrogram the hierarchy above the consensus partition (its
+    level 0) is written to {prefix}_dendrogram.npz / .json for drill-down
+    viewers.
+    
+    With a MetricsCache, the runs and consensus of a cold start are reused
+    whenever the same edge list is clustered again with the same settings.
     """
     # 1. Load and build graph
+    check_similarity_weight(weight)
     edges = pd.read_csv(edges_csv_path)
-    G = nx.from_pandas_edgelist(edges, 'src', 'dst', 
-                               edge_attr='weight', 
-                               create_using=nx.Graph())
+    if weight not in edges.columns:
+        raise ValueError(f"{edges_csv_path} has no '{weight}' column; "
+                         f"association weights are {ASSOCIATION_MEASURES}")
+    if vocab is not None:
+        # Cluster on int32 entity ids, names are resolved again on export
+        edges['src'] = vocab.encode(edges['src'].values)
+        edges['dst'] = vocab.encode(edges['dst'].values)
+        edges = edges[(edges['src'] >= 0) & (edges['dst'] >= 0)]
+    # Clipped measures (ppmi) leave pairs with a zero weight; they are not
+    # ties, and python-louvain rejects non-positive weights
+    edges = edges[edges[weight] > 0]
+    graph = CSRGraph.from_edges(edges, 'src', 'dst', weight)
+    G = graph.to_networkx()
     
     print(f"Graph loaded: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
     
@@ -62,32 +128,54 @@ def run_robust_louvain(edges_csv_path, output_prefix=""):
         singleton_partition = {node: i for i, node in enumerate(G.nodes())}
         return G, singleton_partition, 0.0
     
-    # 2. Run Louvain multiple times for stability
-    runs = []
-    modularities = []
-    
-    for i in range(10):
-        partition = louvain.best_partition(G, weight='weight', 
-                                         resolution=1.0, 
-                                         random_state=i)
-        runs.append(partition)
-        mod = louvain.modularity(partition, G, weight='weight')
-        modularities.append(mod)
-    
-    # 3. Consensus via majority vote
-    consensus_partition = {}
-    for node in G.nodes():
-        labels = [run[node] for run in runs if node in run]
-        if labels:
-            consensus_partition[node] = Counter(labels).most_common(1)[0][0]
-        else:
-            consensus_partition[node] = 0  # fallback for isolated nodes
+    # 2. Run Louvain multiple times for stability, as int32 label arrays
+    # aligned to graph.nodes
+    initial, previous = None, None
+    if initial_partition:
+        initial, previous = initial_labels(graph, initial_partition)
+    
+    if cache is not None and initial is None:
+        result = cache.cached(graph, 'robust_louvain',
+                              lambda: detect_robust_partition(graph, n_runs, resolution,
+                                                              n_workers, method),
+                              weight=weight, n_runs=n_runs, method=method, resolution=resolution)
+    else:
+        result = detect_robust_partition(graph, n_runs, resolution, n_workers, method, initial)
+    runs, modularities = result['runs'], result['modularities']
+    run_seconds = float(result['run_seconds'])
+    
+    if initial is not None:
+        start = time.perf_counter()
+        _, cold_modularities = run_louvain_seeds(graph, n_runs, resolution=resolution,
+                                                 n_workers=n_workers, method=method)
+        cold_seconds = time.perf_counter() - start
+        G.graph['warm_start'] = {
+            'surviving_nodes': int((previous >= 0).sum()),
+            'warm_seconds': run_seconds,
+            'cold_seconds': cold_seconds,
+            'warm_modularity': float(np.mean(modularities)),
+            'cold_modularity': float(np.mean(cold_modularities))
+        }
+        print(f"Warm start: {run_seconds:.2f}s (modularity {np.mean(modularities):.3f}) vs "
+              f"cold start: {cold_seconds:.2f}s (modularity {np.mean(cold_modularities):.3f})")
+    
+    # Agreement between the runs themselves
+    run_stability = mean_pairwise_scores(pairwise_similarity(runs))
+    G.graph['run_stability'] = {f"run_{metric}": value for metric, value in run_stability.items()}
+    
+    # 3. Consensus clustering over the sparse co-association of the runs
+    consensus_labels, confidence = result['consensus_labels'], result['confidence']
+    if previous is not None:
+        if max_community_id is None:
+            max_community_id = max(initial_partition.values())
+        consensus_labels = align_to_previous(consensus_labels, previous, max_community_id)
+    consensus_partition = dict(zip(graph.nodes.tolist(), consensus_labels.tolist()))
     
     # Set community attributes
     nx.set_node_attributes(G, consensus_partition, 'community')
     
     # 4. Calculate final modularity
-    final_modularity = louvain.modularity(consensus_partition, G, weight='weight')
+    final_modularity = label_modularity(graph, consensus_labels, resolution)
     
     # Results summary
     num_communities = len(set(consensus_partition.values()))
@@ -99,12 +187,29 @@ def run_robust_louvain(edges_csv_path, output_prefix=""):
     print(f"Average modularity: {avg_modularity:.3f}")
     print(f"Consensus modularity: {final_modularity:.3f}")
     print(f"Modularity stability (std): {std_modularity:.3f}")
+    print(f"Run agreement: NMI {run_stability['nmi']:.3f}, ARI {run_stability['ari']:.3f}, "
+          f"VI {run_stability['vi']:.3f}")
     
     # Save detailed results
-    community_df = pd.DataFrame([
-        {'node': node, 'community': community} 
-        for node, community in consensus_partition.items()
-    ])
+    community_df = pd.DataFrame({
+        'node': list(consensus_partition.keys()),
+        'community': list(consensus_partition.values()),
+        'confidence': confidence
+    })
+    
+    # Brokerage per node; Gould-Fernandez roles need the vocabulary's jurisdictions
+    jurisdictions = (vocab.attribute('Jurisdiction', graph.nodes.astype(np.int64))
+                     if vocab is not None else None)
+    brokerage = brokerage_table(graph, jurisdictions)
+    community_df = pd.concat([community_df, brokerage.reset_index(drop=True)], axis=1)
+    community_df['core'], community_df['layer'] = onion_decomposition(graph)
+    
+    # Weighted PageRank, eigenvector and Katz centrality by sparse power iteration
+    spectral, _ = spectral_centralities(graph)
+    community_df = pd.concat([community_df, spectral.reset_index(drop=True)], axis=1)
+    
+    if vocab is not None:
+        community_df['node'] = vocab.decode(community_df['node'].values)
     community_df.to_csv(f"{output_prefix}_communities.csv", index=False)
     
     # Save community statistics
@@ -115,19 +220,62 @@ def run_robust_louvain(edges_csv_path, output_prefix=""):
     ]).sort_values('size', ascending=False)
     stats_df.to_csv(f"{output_prefix}_community_stats.csv", index=False)
     
+    # 5. Multi-level hierarchy, coarsest level first in the JSON
+    if save_dendrogram:
+        dendrogram = CommunityDendrogram.from_graph(graph, resolution, labels=consensus_labels)
+        node_labels = vocab.decode(graph.nodes.astype(np.int64)) if vocab is not None else graph.nodes
+        dendrogram.save(f"{output_prefix}_dendrogram.npz")
+        dendrogram.save_json(f"{output_prefix}_dendrogram.json", node_labels)
+        print(f"Dendrogram: {dendrogram.n_levels} levels, "
+              f"{dendrogram.supergraphs[-1].shape[0]} top-level communities")
+    
     return G, consensus_partition, final_modularity
 
-def analyze_temporal_communities():
+def analyze_temporal_communities(chunksize=None, memory_limit_mb=512, n_workers=None,
+                                 period_dates=None, nodes_file_path="final_nodes.csv",
+                                 weight='weight', n_runs=10, method='louvain',
+                                 warm_start=False, resolution=1.0, cache_dir='.metrics_cache'):
     """
-    Complete temporal analysis workflow
+    Complete temporal analysis workflow. Pass chunksize to build edges
+    out-of-core for node files that do not fit in memory, or n_workers to
+    count pairs in parallel.
+    
+    With period_dates ({period: (start, end)}) the edges of every period are
+    cut from one time-indexed store of nodes_file_path instead of the
+    pre-split {period}.csv files, so alternative boundaries need no re-split.
+    weight picks the edge column Louvain clusters on and n_runs the number
+    of Louvain seeds per period; method selects the community_backends engine.
+    With warm_start each period is seeded with the previous period's
+    partition, and warm vs cold runtime and modularity are added to the
+    summary. resolution is passed to every period's community detection.
+    Cold-start partitions are cached in cache_dir (None disables the cache).
     """
-    periods = ['pre_crimea', 'post_crimea', 'covid', 'war']
+    check_similarity_weight(weight)
+    if weight != 'weight' and (chunksize is not None or period_dates):
+        raise ValueError(f"weight='{weight}' needs the association columns, which only the "
+                         f"in-memory edge builder writes; the streaming (chunksize) and "
+                         f"time-indexed store (period_dates) paths only have 'weight'")
+    periods = list(period_dates.keys()) if period_dates else list(PERIOD_DATES.keys())
     results = {}
     temporal_summary = []
     
     print("TEMPORAL ENTITY NETWORK ANALYSIS")
     print("="*60)
     
+    # Shared entity vocabulary written by harshcleanfinal.py, if available
+    vocab = EntityVocabulary.load_if_exists()
+    if vocab is not None:
+        print(f"Using shared entity vocabulary ({len(vocab)} entities)")
+    
+    store = None
+    if period_dates:
+        store = TemporalEdgeStore.from_nodes(pd.read_csv(nodes_file_path), vocab)
+        print(f"Time-indexed edge store: {len(store.days)} pair contributions")
+    
+    cache = MetricsCache(cache_dir) if cache_dir else None
+    previous_partition = None
+    max_community_id = -1
+    
     for period in periods:
         print(f"\n{'='*20} {period.upper()} PERIOD {'='*20}")
         
@@ -136,10 +284,21 @@ def analyze_temporal_communities():
         edges_file = f"{period}_edges.csv"
         
         try:
-            edges_df = create_edges_from_nodes(nodes_file, edges_file)
+            if store is not None:
+                start_date, end_date = period_dates[period]
+                edges_df = store.window(start_date, end_date)
+                edges_df.to_csv(edges_file, index=False)
+                print(f"Created {len(edges_df)} edges for {start_date} to {end_date}")
+            else:
+                edges_df = create_edges_from_nodes(nodes_file, edges_file, vocab,
+                                                   chunksize, memory_limit_mb, n_workers)
             
             # Step 2: Run Louvain community detection
-            G, partition, modularity = run_robust_louvain(edges_file, period)
+            G, partition, modularity = run_robust_louvain(edges_file, period, vocab, weight,
+                                                          n_runs, n_workers, method,
+                                                          previous_partition, resolution,
+                                                          cache=cache,
+                                                          max_community_id=max_community_id)
             
             if G is not None:
                 results[period] = {
@@ -151,20 +310,34 @@ def analyze_temporal_communities():
                     'communities': len(set(partition.values())) if partition else 0
                 }
                 
-                temporal_summary.append({
+                period_summary = {
                     'period': period,
                     'nodes': G.number_of_nodes(),
                     'edges': G.number_of_edges(),
                     'communities': len(set(partition.values())),
                     'modularity': modularity,
                     'avg_community_size': G.number_of_nodes() / len(set(partition.values())) if partition else 0
-                })
+                }
+                period_summary.update(G.graph.get('run_stability', {}))
+                period_summary.update(G.graph.get('warm_start', {}))
+                temporal_summary.append(period_summary)
+                
+                if warm_start:
+                    previous_partition = partition
+                    max_community_id = max(max_community_id, max(partition.values()))
             else:
                 print(f"Skipping {period} due to insufficient data")
+                # Never align the next period against an older window
+                previous_partition = None
                 
         except FileNotFoundError:
             print(f"Error: {nodes_file} not found. Please ensure all period files exist.")
+            previous_partition = None
         except Exception as e:
+            # A failed warm-started period would leave the next one aligned
+            # against the wrong window, so warm starts stop here
+            if warm_start:
+                raise
             print(f"Error processing {period}: {str(e)}")
     
     # Create temporal summary
@@ -180,6 +353,13 @@ def analyze_temporal_communities():
         print(f"\nPeriod with strongest community structure: {best_period['period'].upper()}")
         print(f"Modularity: {best_period['modularity']:.3f}")
     
+    # How much the communities shift between periods, on the entities they share
+    if len(results) > 1:
+        similarity = pairwise_similarity({period: r['partition'] for period, r in results.items()})
+        save_similarity_matrices(similarity, "temporal_similarity")
+        print("\nCommunity similarity between periods (NMI on shared entities):")
+        print(similarity['nmi'].round(3).to_string())
+    
     return results
 
 # Execute the complete analysis
@@ -0,0 +1,59 @@
+import pandas as pd
+import numpy as np
+from csr_graph import CSRGraph
+from cooccurrence import check_similarity_weight
+
+
+def disparity_alpha(graph, src, dst, weight):
+    """
+    Disparity filter significance (Serrano, Boguñá & Vespignani 2009) for
+    the given edges, vectorized over the CSR degree and strength arrays.
+
+    For an edge of weight w at a node of degree k and strength s,
+    alpha = (1 - w/s)^(k-1) is the probability of seeing a share that large
+    under uniformly random weights. An edge is as significant as its best
+    endpoint, so the lower of its two alphas is kept.
+    """
+    degree = graph.degree().astype(np.float64)
+    strength = graph.strength()
+    weight = np.asarray(weight, dtype=np.float64)
+
+    alpha_src = np.power(1.0 - weight / strength[src], degree[src] - 1)
+    alpha_dst = np.power(1.0 - weight / strength[dst], degree[dst] - 1)
+    return np.minimum(alpha_src, alpha_dst)
+
+def disparity_filter(graph):
+    """Disparity alpha of every edge of a CSRGraph as (src, dst, weight, alpha) arrays"""
+    src, dst, weight = graph.upper_edges()
+    return src, dst, weight, disparity_alpha(graph, src, dst, weight)
+
+def extract_backbone(edges_df, max_edges=None, alpha=None, weight='weight',
+                     src_col='src', dst_col='dst'):
+    """
+    Keep the statistically salient edges of an edge list instead of the
+    heaviest ones. Significance is computed on the full graph; edges are then
+    ranked by alpha (ties broken by weight) and cut at the alpha threshold
+    and/or the max_edges budget. The returned edges carry an 'alpha' column.
+    """
+    check_similarity_weight(weight)
+    # Zero weights (clipped ppmi) are not ties and would inflate the degrees
+    edges_df = edges_df[(edges_df[src_col] != edges_df[dst_col]) & (edges_df[weight] > 0)]
+    if edges_df.empty:
+        return edges_df.assign(alpha=pd.Series(dtype=np.float64))
+
+    graph = CSRGraph.from_edges(edges_df, src_col, dst_col, weight)
+    index = pd.Index(graph.nodes)
+    src = index.get_indexer(edges_df[src_col].values)
+    dst = index.get_indexer(edges_df[dst_col].values)
+
+    backbone = edges_df.assign(alpha=disparity_alpha(graph, src, dst, edges_df[weight].values))
+
+    if alpha is not None:
+        backbone = backbone[backbone['alpha'] <= alpha]
+
+    order = np.lexsort((-backbone[weight].values, backbone['alpha'].values))
+    backbone = backbone.iloc[order]
+    if max_edges is not None:
+        backbone = backbone.head(max_edges)
+
+    return backbone.reset_index(drop=True)
@@ -0,0 +1,68 @@
+import pandas as pd
+import numpy as np
+import os
+import time
+from csr_graph import CSRGraph
+from community_backends import available_backends, get_backend
+from multiseed import label_modularity
+
+def benchmark_backends(periods=None, methods=None, repeats=3, resolution=1.0, weight='weight'):
+    """
+    Time every available community detection backend on each period's
+    {period}_edges.csv and report the best run time and the modularity of
+    its partition. Conversion into the backend's graph type is timed
+    separately from the clustering itself.
+    """
+    if periods is None:
+        periods = ['pre_crimea', 'post_crimea', 'covid', 'war']
+
+    if methods is None:
+        methods = available_backends()
+
+    results = []
+
+    for period in periods:
+        edges_file = f"{period}_edges.csv"
+        if not os.path.exists(edges_file):
+            print(f"Skipping {period}: {edges_file} not found")
+            continue
+
+        graph = CSRGraph.from_edges(pd.read_csv(edges_file), weight=weight)
+
+        for method in methods:
+            prepare, run = get_backend(method)
+
+            start = time.perf_counter()
+            prepared = prepare(graph)
+            prepare_time = time.perf_counter() - start
+
+            run_times, modularities = [], []
+            for seed in range(repeats):
+                start = time.perf_counter()
+                labels = run(prepared, resolution=resolution, seed=seed)
+                run_times.append(time.perf_counter() - start)
+                modularities.append(label_modularity(graph, labels, resolution))
+
+            results.append({
+                'period': period,
+                'method': method,
+                'nodes': graph.n_nodes,
+                'edges': graph.n_edges,
+                'prepare_seconds': round(prepare_time, 4),
+                'run_seconds': round(min(run_times), 4),
+                'modularity_mean': round(float(np.mean(modularities)), 4),
+                'modularity_max': round(float(np.max(modularities)), 4),
+                'communities': len(np.unique(labels))
+            })
+            print(f"{period} {method}: {min(run_times):.3f}s, "
+                  f"modularity {np.mean(modularities):.3f}")
+
+    results_df = pd.DataFrame(results)
+    if not results_df.empty:
+        results_df.to_csv("community_benchmark.csv", index=False)
+        print("\n" + results_df.to_string(index=False))
+
+    return results_df
+
+if __name__ == "__main__":
+    benchmark_backends()
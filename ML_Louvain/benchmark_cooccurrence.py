@@ -0,0 +1,103 @@
+import pandas as pd
+import os
+import time
+from collections import defaultdict
+from cooccurrence import cooccurrence_edges, parallel_cooccurrence_edges
+
+def loop_cooccurrence_edges(df):
+    """
+    Original nested pair loop from Louvain.create_edges_from_nodes, kept as
+    the reference implementation for the benchmark
+    """
+    grouped = df.groupby('Article_ID')['Entity'].apply(list)
+    edge_weights = defaultdict(int)
+
+    for entities in grouped:
+        unique_entities = list(set(entities))
+        n = len(unique_entities)
+
+        for i in range(n):
+            for j in range(i+1, n):
+                edge = tuple(sorted([unique_entities[i], unique_entities[j]]))
+                edge_weights[edge] += 1
+
+    return pd.DataFrame([
+        {'src': src, 'dst': dst, 'weight': weight}
+        for (src, dst), weight in edge_weights.items()
+    ])
+
+def edges_match(loop_df, sparse_df):
+    """Check that both implementations produce the same weighted edge set"""
+    if loop_df.empty or sparse_df.empty:
+        return loop_df.empty and sparse_df.empty
+
+    key = ['src', 'dst']
+    left = loop_df.sort_values(key).reset_index(drop=True)
+    right = sparse_df.sort_values(key).reset_index(drop=True)
+    return left[key + ['weight']].equals(right[key + ['weight']])
+
+def benchmark_periods(periods=None, repeats=3, n_workers=None):
+    """
+    Time the pair loop against the sparse AᵀA engine, single-process and
+    sharded across n_workers processes, on each period file
+    """
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    if periods is None:
+        periods = ['pre_crimea', 'post_crimea', 'covid', 'war']
+
+    results = []
+
+    for period in periods:
+        nodes_file = f"{period}.csv"
+        if not os.path.exists(nodes_file):
+            print(f"Skipping {period}: {nodes_file} not found")
+            continue
+
+        df = pd.read_csv(nodes_file)
+
+        loop_times, sparse_times, parallel_times = [], [], []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            loop_df = loop_cooccurrence_edges(df)
+            loop_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            sparse_df = cooccurrence_edges(df)
+            sparse_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            parallel_df = parallel_cooccurrence_edges(df, n_workers)
+            parallel_times.append(time.perf_counter() - start)
+
+        loop_time = min(loop_times)
+        sparse_time = min(sparse_times)
+        parallel_time = min(parallel_times)
+
+        results.append({
+            'period': period,
+            'rows': len(df),
+            'articles': df['Article_ID'].nunique(),
+            'entities': df['Entity'].nunique(),
+            'edges': len(sparse_df),
+            'loop_seconds': round(loop_time, 4),
+            'sparse_seconds': round(sparse_time, 4),
+            'speedup': round(loop_time / sparse_time, 1) if sparse_time > 0 else float('inf'),
+            'parallel_seconds': round(parallel_time, 4),
+            'workers': n_workers,
+            'identical': edges_match(loop_df, sparse_df),
+            'parallel_identical': sparse_df.to_csv(index=False) == parallel_df.to_csv(index=False)
+        })
+        print(f"{period}: loop {loop_time:.3f}s, sparse {sparse_time:.3f}s, "
+              f"parallel ({n_workers} workers) {parallel_time:.3f}s")
+
+    results_df = pd.DataFrame(results)
+    if not results_df.empty:
+        results_df.to_csv("cooccurrence_benchmark.csv", index=False)
+        print("\n" + results_df.to_string(index=False))
+
+    return results_df
+
+if __name__ == "__main__":
+    benchmark_periods()
@@ -0,0 +1,126 @@
+import numpy as np
+import hashlib
+import json
+import os
+from csr_graph import CSRGraph
+
+
+def graph_key(graph, **params):
+    """
+    Content hash of a graph plus algorithm parameters. The graph is hashed
+    as its canonical edge list (labels as strings, each edge once with the
+    smaller label first, edges sorted) plus the sorted node labels, so the
+    key does not depend on node or edge insertion order. Accepts a CSRGraph
+    or a NetworkX graph.
+    """
+    if not isinstance(graph, CSRGraph):
+        graph = CSRGraph.from_networkx(graph)
+
+    labels = np.array([str(node) for node in graph.nodes], dtype=object)
+    src, dst, weight = graph.upper_edges()
+    a, b = labels[src], labels[dst]
+    swap = a > b
+    a, b = np.where(swap, b, a), np.where(swap, a, b)
+    order = np.lexsort((b, a))
+
+    digest = hashlib.sha256()
+    digest.update('\x00'.join(sorted(labels)).encode('utf-8'))
+    digest.update(b'\x01')
+    digest.update('\x00'.join(a[order]).encode('utf-8'))
+    digest.update(b'\x01')
+    digest.update('\x00'.join(b[order]).encode('utf-8'))
+    digest.update(b'\x01')
+    digest.update(np.ascontiguousarray(weight[order], dtype=np.float64).tobytes())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class MetricsCache:
+    """
+    On-disk cache of per-graph results (partitions, centralities, layouts)
+    keyed by graph_key, one compressed .npz file per entry. A hit touches the
+    file's modification time, and once the directory grows past max_bytes
+    the least recently used entries are deleted.
+    """
+
+    def __init__(self, cache_dir='.metrics_cache', max_bytes=512 * 1024 ** 2):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, key):
+        """Stored arrays of an entry as a dict, or None on a miss"""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=True) as data:
+                arrays = {name: data[name] for name in data.files}
+        except (OSError, ValueError, EOFError):
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return arrays
+
+    def put(self, key, arrays):
+        """Store a dict of arrays under key and evict down to max_bytes"""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.npz'):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+
+    def cached(self, graph, name, compute, **params):
+        """
+        Arrays returned by compute() for this graph and parameters, loaded
+        from the cache when the same graph was seen before
+        """
+        key = graph_key(graph, name=name, **params)
+        arrays = self.get(key)
+        if arrays is None:
+            arrays = compute()
+            self.put(key, arrays)
+        return arrays
+
+    def node_metrics(self, G, name, compute, **params):
+        """
+        Cached per-node results of a NetworkX graph. compute() returns a dict
+        of {metric: {node: value}} (values may be tuples, e.g. layout
+        positions) and the same structure is returned on a hit.
+        """
+        def compute_arrays():
+            metrics = compute()
+            nodes = list(G.nodes())
+            arrays = {'__nodes__': np.empty(len(nodes), dtype=object)}
+            arrays['__nodes__'][:] = nodes
+            for metric, values in metrics.items():
+                arrays[metric] = np.array([values[node] for node in nodes])
+            return arrays
+
+        arrays = self.cached(G, name, compute_arrays, **params)
+        nodes = arrays.pop('__nodes__').tolist()
+        return {
+            metric: {node: (tuple(value) if values.ndim > 1 else value)
+                     for node, value in zip(nodes, values.tolist())}
+            for metric, values in arrays.items()
+        }
@@ -0,0 +1,259 @@
+import pandas as pd
+import numpy as np
+import os
+from concurrent.futures import ProcessPoolExecutor
+from scipy import sparse
+from scipy.sparse import csgraph
+from scipy.stats import norm
+from csr_graph import CSRGraph
+
+# Graph arrays received once per worker process by _init_worker
+_worker = {}
+
+
+def _init_worker(indptr, indices, data, n_nodes, weighted):
+    """Pool initializer: rebuild the path-length matrix and the edge arrays once"""
+    lengths = sparse.csr_matrix((1.0 / data if weighted else np.ones(len(data)), indices, indptr),
+                                shape=(n_nodes, n_nodes))
+    _worker['lengths'] = lengths
+    _worker['row'] = np.repeat(np.arange(n_nodes), np.diff(indptr))
+    _worker['weighted'] = weighted
+
+def source_dependencies(dist, source, row, col, lengths, weighted):
+    """
+    Brandes dependency of every node on one source, given the distances from
+    that source. The shortest-path DAG is walked level by level (one level
+    per distinct distance), accumulating path counts forward and
+    dependencies backward with vectorized scatter-adds.
+    """
+    n_nodes = len(dist)
+    reach = np.isfinite(dist)
+    candidate = reach[row]
+    if weighted:
+        on_path = candidate & np.isclose(dist[row] + lengths, dist[col], rtol=1e-9, atol=0)
+    else:
+        on_path = candidate & (dist[row] + 1 == dist[col])
+    r, c = row[on_path], col[on_path]
+
+    order = np.argsort(dist[r], kind='stable')
+    r, c = r[order], c[order]
+    _, starts = np.unique(dist[r], return_index=True)
+    bounds = np.r_[starts, len(r)]
+
+    sigma = np.zeros(n_nodes)
+    sigma[source] = 1.0
+    for i in range(len(starts)):
+        level = slice(bounds[i], bounds[i + 1])
+        np.add.at(sigma, c[level], sigma[r[level]])
+
+    delta = np.zeros(n_nodes)
+    for i in reversed(range(len(starts))):
+        level = slice(bounds[i], bounds[i + 1])
+        rl, cl = r[level], c[level]
+        np.add.at(delta, rl, sigma[rl] / sigma[cl] * (1.0 + delta[cl]))
+    delta[source] = 0.0
+    return delta
+
+def _run_sources(sources):
+    """
+    Pool worker: single-source shortest paths from a batch of sources,
+    returned as per-node sums (and sums of squares) of the dependency,
+    distance and reachability contributions, plus the eccentricity of each
+    source within its component
+    """
+    lengths, row, weighted = _worker['lengths'], _worker['row'], _worker['weighted']
+    col, edge_lengths = lengths.indices, lengths.data
+    n_nodes = lengths.shape[0]
+
+    distances = csgraph.shortest_path(lengths, method='D', directed=False,
+                                      unweighted=not weighted, indices=sources)
+    sums = np.zeros((5, n_nodes))
+    eccentricity = np.zeros(len(sources))
+    for i, (source, dist) in enumerate(zip(sources, np.atleast_2d(distances))):
+        delta = source_dependencies(dist, source, row, col, edge_lengths, weighted)
+        reach = np.isfinite(dist)
+        finite_dist = np.where(reach, dist, 0.0)
+        sums[0] += delta
+        sums[1] += delta ** 2
+        sums[2] += finite_dist
+        sums[3] += finite_dist ** 2
+        sums[4] += reach
+        eccentricity[i] = finite_dist.max()
+    return sums, eccentricity
+
+def _source_pool(graph, weighted, n_workers):
+    """Process pool with the graph loaded in every worker, or None to run in-process"""
+    init_args = (graph.indptr, graph.indices, graph.weights, graph.n_nodes, weighted)
+    if n_workers <= 1:
+        _init_worker(*init_args)
+        return None
+    return ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                               initargs=init_args)
+
+def _map_sources(pool, sources, n_workers):
+    """Split sources into one chunk per worker and yield (chunk, sums, eccentricity)"""
+    chunks = [chunk for chunk in np.array_split(sources, n_workers) if len(chunk)]
+    results = map(_run_sources, chunks) if pool is None else pool.map(_run_sources, chunks)
+    for chunk, (sums, eccentricity) in zip(chunks, results):
+        yield chunk, sums, eccentricity
+
+def _mean_and_se(total, total_sq, k, n):
+    """Sample mean and standard error with the finite-population correction"""
+    mean = total / k
+    if k < 2:
+        return mean, np.full_like(mean, np.inf)
+    variance = np.maximum(total_sq / k - mean ** 2, 0.0) * k / (k - 1)
+    fpc = np.sqrt(max(n - k, 0) / (n - 1)) if n > 1 else 0.0
+    return mean, np.sqrt(variance / k) * fpc
+
+def sampled_centrality(graph, epsilon=0.01, confidence=0.95, weighted=False, batch_size=None,
+                       min_sources=None, max_sources=None, n_workers=None, seed=0):
+    """
+    Betweenness and closeness of every node of a CSRGraph, estimated from
+    a growing random sample of source nodes.
+
+    Sources are drawn without replacement in batches; each batch runs
+    single-source shortest paths (BFS, or Dijkstra on 1/weight with
+    weighted=True) in a process pool over the CSR arrays. Sampling stops once
+    the confidence-interval half-width of every node's normalized
+    betweenness and closeness is at most epsilon, or every node has been a
+    source (the exact result).
+
+    Normalization matches networkx (betweenness_centrality with
+    normalized=True, Wasserman-Faust closeness_centrality). Returns a
+    DataFrame indexed by graph.nodes with betweenness, closeness, their CI
+    bounds, and the number of sources used in attrs['sources'].
+    """
+    n = graph.n_nodes
+    columns = ['betweenness', 'betweenness_low', 'betweenness_high',
+               'closeness', 'closeness_low', 'closeness_high']
+    if n == 0:
+        return pd.DataFrame(columns=columns)
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    if batch_size is None:
+        batch_size = max(8, 4 * n_workers)
+    if min_sources is None:
+        min_sources = min(n, 2 * batch_size)
+    if max_sources is None:
+        max_sources = n
+
+    z = norm.ppf(0.5 + confidence / 2)
+    order = np.random.default_rng(seed).permutation(n)
+    pool = _source_pool(graph, weighted, n_workers)
+
+    sums = np.zeros((5, n))
+    k = 0
+    try:
+        while k < min(n, max_sources):
+            batch = order[k:min(k + batch_size, max_sources)]
+            for _, partial, _ in _map_sources(pool, batch, n_workers):
+                sums += partial
+            k += len(batch)
+
+            if k >= min_sources:
+                scale = n / ((n - 1) * (n - 2)) if n > 2 else 0.0
+                _, between_se = _mean_and_se(sums[0] * scale, sums[1] * scale ** 2, k, n)
+                _, farness_se = _mean_and_se(sums[2], sums[3], k, n)
+                closeness_width = _closeness_width(sums, farness_se, k, n, z)
+                if np.max(z * between_se) <= epsilon and np.max(closeness_width) <= epsilon:
+                    break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # Betweenness: mean per-source dependency, scaled like networkx
+    scale = n / ((n - 1) * (n - 2)) if n > 2 else 0.0
+    betweenness, between_se = _mean_and_se(sums[0] * scale, sums[1] * scale ** 2, k, n)
+
+    # Closeness from the estimated farness and reachable count
+    farness_mean, farness_se = _mean_and_se(sums[2], sums[3], k, n)
+    reachable = sums[4] * n / k
+    closeness = _closeness(farness_mean * n, reachable, n)
+    closeness_low = _closeness((farness_mean + z * farness_se) * n, reachable, n)
+    closeness_high = _closeness(np.maximum(farness_mean - z * farness_se, 0.0) * n, reachable, n)
+
+    result = pd.DataFrame({
+        'betweenness': betweenness,
+        'betweenness_low': np.maximum(betweenness - z * between_se, 0.0),
+        'betweenness_high': betweenness + z * between_se,
+        'closeness': closeness,
+        'closeness_low': closeness_low,
+        'closeness_high': np.maximum(closeness_high, closeness),
+    }, index=graph.nodes)
+    result.attrs['sources'] = k
+    return result
+
+def _closeness(farness, reachable, n):
+    """Wasserman-Faust closeness from total distance and reachable-node count"""
+    others = reachable - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        closeness = np.where(farness > 0, others / farness, 0.0)
+    return closeness * (others / (n - 1) if n > 1 else 0.0)
+
+def _closeness_width(sums, farness_se, k, n, z):
+    """Half-width of the closeness interval implied by the farness interval"""
+    farness = sums[2] / k * n
+    reachable = sums[4] * n / k
+    upper = _closeness(np.maximum(farness - z * farness_se * n, 0.0), reachable, n)
+    lower = _closeness(farness + z * farness_se * n, reachable, n)
+    return np.where(np.isfinite(upper - lower), (upper - lower) / 2, np.inf)
+
+def fused_metrics(graph, weighted=False, n_workers=None):
+    """
+    Exact node and graph metrics of a CSRGraph from one shortest-path
+    traversal per source, run in parallel over source chunks. Each source's
+    BFS (or Dijkstra on 1/weight) feeds betweenness, closeness,
+    eccentricity and path-length sums at once instead of one all-pairs pass
+    per networkx call.
+
+    Returns (node_metrics, graph_metrics): a DataFrame indexed by
+    graph.nodes with betweenness, closeness, eccentricity and path_length_sum
+    (farness), and a dict with the average shortest path length and diameter
+    of the largest connected component.
+    """
+    n = graph.n_nodes
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    sums = np.zeros((5, n))
+    eccentricity = np.zeros(n)
+    pool = _source_pool(graph, weighted, n_workers)
+    try:
+        for chunk, partial, chunk_eccentricity in _map_sources(pool, np.arange(n), n_workers):
+            sums += partial
+            eccentricity[chunk] = chunk_eccentricity
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    scale = 1.0 / ((n - 1) * (n - 2)) if n > 2 else 0.0
+    node_metrics = pd.DataFrame({
+        'betweenness': sums[0] * scale,
+        'closeness': _closeness(sums[2], sums[4], n),
+        'eccentricity': eccentricity,
+        'path_length_sum': sums[2],
+    }, index=graph.nodes)
+
+    # Graph-level metrics on the largest connected component
+    _, component = csgraph.connected_components(graph.adjacency, directed=False)
+    largest = component == np.argmax(np.bincount(component)) if n else np.zeros(0, dtype=bool)
+    size = int(largest.sum())
+    graph_metrics = {
+        'largest_component_size': size,
+        'avg_path_length': float(sums[2][largest].sum() / (size * (size - 1))) if size > 1 else 0,
+        'diameter': (float if weighted else int)(eccentricity[largest].max()) if size > 1 else 0,
+    }
+    return node_metrics, graph_metrics
+
+def networkx_centrality(G, epsilon=0.01, weighted=False, n_workers=None, seed=0):
+    """
+    sampled_centrality for a NetworkX graph, as {node: value} dicts:
+    (betweenness, closeness, betweenness_ci) where betweenness_ci is the
+    confidence-interval half-width
+    """
+    result = sampled_centrality(CSRGraph.from_networkx(G), epsilon=epsilon, weighted=weighted,
+                                n_workers=n_workers, seed=seed)
+    ci = (result['betweenness_high'] - result['betweenness_low']) / 2
+    return (result['betweenness'].to_dict(), result['closeness'].to_dict(), ci.to_dict())
@@ -0,0 +1,94 @@
+import numpy as np
+import networkx.algorithms.community as nx_comm
+import community as louvain  # pip install python-louvain
+from csr_graph import CSRGraph
+
+# Compiled Leiden backend is optional
+try:
+    import igraph as ig
+    import leidenalg  # pip install leidenalg python-igraph
+except ImportError:
+    ig = None
+    leidenalg = None
+
+
+# Every backend is a (prepare, run) pair. prepare converts a CSRGraph into
+# the engine's own graph type once; run clusters the prepared graph and
+# returns an int32 label per CSR row, so repeated runs (seeds, resolutions)
+# do not pay for the conversion again.
+
+def _positional_networkx(graph):
+    return CSRGraph(graph.adjacency, np.arange(graph.n_nodes)).to_networkx()
+
+def _run_louvain(G, resolution=1.0, seed=None, initial=None):
+    if initial is not None:
+        initial = dict(enumerate(initial.tolist()))
+    partition = louvain.best_partition(G, partition=initial, weight='weight',
+                                       resolution=resolution, random_state=seed)
+    n_nodes = G.number_of_nodes()
+    return np.fromiter((partition[i] for i in range(n_nodes)), dtype=np.int32, count=n_nodes)
+
+def _run_networkx(G, resolution=1.0, seed=None, initial=None):
+    communities = nx_comm.louvain_communities(G, weight='weight', resolution=resolution, seed=seed)
+    return communities_to_labels(communities, G.number_of_nodes())
+
+def _prepare_leiden(graph):
+    src, dst, weight = graph.upper_edges()
+    return ig.Graph(n=graph.n_nodes, edges=np.column_stack([src, dst]).tolist(),
+                    edge_attrs={'weight': weight.tolist()})
+
+def _run_leiden(g, resolution=1.0, seed=None, initial=None):
+    partition = leidenalg.find_partition(
+        g, leidenalg.RBConfigurationVertexPartition, weights='weight',
+        resolution_parameter=resolution, seed=seed,
+        initial_membership=None if initial is None else initial.tolist()
+    )
+    return np.asarray(partition.membership, dtype=np.int32)
+
+BACKENDS = {
+    'louvain': (_positional_networkx, _run_louvain),
+    'networkx': (_positional_networkx, _run_networkx),
+    'leiden': (_prepare_leiden, _run_leiden),
+}
+
+def available_backends():
+    """Backend names whose libraries are importable here"""
+    return [name for name in BACKENDS if name != 'leiden' or leidenalg is not None]
+
+def get_backend(method):
+    """(prepare, run) pair of a backend name"""
+    if method not in BACKENDS:
+        raise ValueError(f"Unknown community detection method '{method}'. "
+                         f"Available: {list(BACKENDS)}")
+    if method == 'leiden' and leidenalg is None:
+        raise ImportError("The leiden backend needs leidenalg and python-igraph "
+                          "(pip install leidenalg python-igraph)")
+    return BACKENDS[method]
+
+def communities_to_labels(communities, n_nodes):
+    """List of node-index sets -> int32 label array"""
+    labels = np.zeros(n_nodes, dtype=np.int32)
+    for i, community in enumerate(communities):
+        labels[list(community)] = i
+    return labels
+
+def detect_communities(graph, method='louvain', resolution=1.0, seed=None, initial=None):
+    """
+    Community labels of a CSRGraph (one int32 per row of graph.nodes) from
+    the named backend. initial is an optional int label array warm start;
+    the networkx backend has no warm start and ignores it.
+    """
+    prepare, run = get_backend(method)
+    return run(prepare(graph), resolution=resolution, seed=seed, initial=initial)
+
+def detect_networkx_communities(G, method='louvain', resolution=1.0, seed=42):
+    """
+    Drop-in for nx_comm.louvain_communities on a NetworkX graph: returns a
+    list of node sets, computed by the named backend
+    """
+    graph = CSRGraph.from_networkx(G)
+    labels = detect_communities(graph, method, resolution, seed)
+    communities = [set() for _ in range(labels.max() + 1 if len(labels) else 0)]
+    for node, label in zip(graph.nodes.tolist(), labels.tolist()):
+        communities[label].add(node)
+    return [c for c in communities if c]
@@ -0,0 +1,89 @@
+import numpy as np
+from scipy import sparse
+from csr_graph import CSRGraph
+from multiseed import label_modularity, run_louvain_seeds
+
+
+def coassociation(graph, labels):
+    """
+    Fraction of runs that put the two endpoints of each edge in the same
+    community, as (src, dst, fraction) over the upper-triangle edges.
+
+    Only existing edges are scored, so memory is O(edges) rather than the
+    O(nodes^2) of a dense co-association matrix; runs are accumulated one
+    at a time into a single count array.
+    """
+    src, dst, _ = graph.upper_edges()
+    together = np.zeros(len(src), dtype=np.int32)
+    for run in labels:
+        together += run[src] == run[dst]
+    return src, dst, together / max(len(labels), 1)
+
+def coassociation_graph(graph, src, dst, fraction, threshold=0.5):
+    """CSRGraph over the same nodes keeping edges co-assigned in >= threshold of runs"""
+    keep = fraction >= threshold
+    src, dst, fraction = src[keep], dst[keep], fraction[keep]
+    adjacency = sparse.coo_matrix(
+        (np.r_[fraction, fraction], (np.r_[src, dst], np.r_[dst, src])),
+        shape=(graph.n_nodes, graph.n_nodes)
+    ).tocsr()
+    return CSRGraph(adjacency, graph.nodes)
+
+def node_confidence(graph, labels, fraction):
+    """
+    Per-node consensus confidence: the weighted share of runs in which the
+    node was grouped with its consensus-community neighbours. Nodes without
+    a neighbour in their own community get 0.
+    """
+    src, dst, weight = graph.upper_edges()
+    internal = labels[src] == labels[dst]
+    agreed = weight * fraction * internal
+    total = weight * internal
+
+    n_nodes = graph.n_nodes
+    agreed_sum = np.bincount(src, agreed, n_nodes) + np.bincount(dst, agreed, n_nodes)
+    total_sum = np.bincount(src, total, n_nodes) + np.bincount(dst, total, n_nodes)
+    return np.divide(agreed_sum, total_sum, out=np.zeros(n_nodes), where=total_sum > 0)
+
+def consensus_clustering(graph, labels, threshold=0.5, n_runs=None, max_iter=10,
+                         n_workers=None, method='louvain', resolution=1.0):
+    """
+    Consensus clustering (Lancichinetti & Fortunato 2012) of the Louvain runs
+    in labels (n_runs x n_nodes, aligned to graph.nodes).
+
+    The runs are turned into a sparse co-association graph over the original
+    edges, edges below threshold are dropped and Louvain is re-run on that
+    graph until every run agrees or max_iter is reached. Unlike a vote on raw
+    labels this does not depend on how each run happened to number its
+    communities.
+
+    method and resolution configure the community_backends re-clustering.
+
+    Returns (consensus_labels, confidence) where confidence is the per-node
+    agreement of the original runs with the consensus (see node_confidence).
+    """
+    if n_runs is None:
+        n_runs = len(labels)
+
+    src, dst, fraction = coassociation(graph, labels)
+    original_fraction = fraction
+    runs = labels
+
+    for iteration in range(max_iter):
+        # Every run agrees on every edge: the partition is stable
+        if np.all((fraction == 0) | (fraction == 1)):
+            break
+        consensus_graph = coassociation_graph(graph, src, dst, fraction, threshold)
+        runs, _ = run_louvain_seeds(consensus_graph, n_runs, resolution, n_workers,
+                                    method=method)
+        _, _, fraction = coassociation(graph, runs)
+    else:
+        print(f"Consensus did not converge after {max_iter} iterations; "
+              f"keeping the best-modularity run")
+
+    modularities = [label_modularity(graph, run, resolution) for run in runs]
+    _, consensus_labels = np.unique(runs[int(np.argmax(modularities))], return_inverse=True)
+    consensus_labels = consensus_labels.astype(np.int32)
+
+    confidence = node_confidence(graph, consensus_labels, original_fraction)
+    return consensus_labels, confidence
@@ -0,0 +1,356 @@
+import pandas as pd
+import numpy as np
+import os
+import heapq
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from scipy import sparse
+from scipy.stats import hypergeom
+from entity_vocab import EntityVocabulary
+
+# Normalized edge weightings available next to the raw co-occurrence count
+ASSOCIATION_MEASURES = ['ppmi', 'jaccard', 'cosine', 'lift', 'hypergeom_p']
+
+# Edge columns where a larger value means a stronger tie, i.e. usable as
+# clustering or backbone weights (hypergeom_p is a p-value: smaller = stronger)
+SIMILARITY_WEIGHTS = ['weight', 'ppmi', 'jaccard', 'cosine', 'lift']
+
+def check_similarity_weight(weight):
+    """Raise ValueError unless weight is a larger-is-stronger edge column"""
+    if weight not in SIMILARITY_WEIGHTS:
+        raise ValueError(f"'{weight}' cannot be used as an edge weight; choose one of "
+                         f"{SIMILARITY_WEIGHTS} (hypergeom_p is a p-value, smaller = stronger)")
+
+def code_mentions(df, article_col='Article_ID', entity_col='Entity', vocab=None):
+    """
+    Integer-code the article and entity of every mention. Entity codes follow
+    the sorted entity names, or the ids of a shared EntityVocabulary.
+    Returns (article_codes, entity_codes, n_articles, entity_names).
+    """
+    df = df.dropna(subset=[article_col, entity_col])
+
+    if vocab is not None:
+        entity_codes = vocab.encode(df[entity_col].values)
+        known = entity_codes >= 0
+        if not known.all():
+            print(f"Warning: {(~known).sum()} mentions of entities missing from the vocabulary were skipped")
+            df = df[known]
+            entity_codes = entity_codes[known]
+        entities = vocab.names
+    else:
+        entity_codes, entities = pd.factorize(df[entity_col], sort=True)
+
+    article_codes, articles = pd.factorize(df[article_col])
+
+    return article_codes, entity_codes, len(articles), np.asarray(entities, dtype=object)
+
+def incidence_from_codes(article_codes, entity_codes, n_articles, n_entities, binary=True):
+    """Sparse article x entity incidence matrix from integer-coded mentions"""
+    A = sparse.csr_matrix(
+        (np.ones(len(entity_codes), dtype=np.int32), (article_codes, entity_codes)),
+        shape=(n_articles, n_entities)
+    )
+    A.sum_duplicates()
+    if binary:
+        A.data[:] = 1
+    return A
+
+def build_incidence_matrix(df, article_col='Article_ID', entity_col='Entity', binary=True,
+                           vocab=None):
+    """
+    Integer-code articles and entities and build the sparse article x entity
+    incidence matrix A. Entity codes follow the sorted entity names (or the
+    ids of a shared EntityVocabulary), so the upper triangle of AᵀA has
+    src < dst.
+
+    With binary=True an entity counts once per article (same as set(entities));
+    with binary=False A holds mention counts, which reproduces combinations()
+    over the raw mention list.
+    """
+    article_codes, entity_codes, n_articles, entities = code_mentions(
+        df, article_col, entity_col, vocab)
+    A = incidence_from_codes(article_codes, entity_codes, n_articles, len(entities), binary)
+    return A, entities
+
+def cooccurrence_matrix(A):
+    """
+    Entity x entity co-occurrence counts as the strict upper triangle of AᵀA
+    """
+    C = (A.T @ A).tocoo()
+    return sparse.triu(C, k=1, format='coo')
+
+def entity_article_counts(article_codes, entity_codes, n_entities):
+    """Number of distinct articles mentioning each entity"""
+    mentions = np.unique((article_codes.astype(np.int64) << 32) | entity_codes.astype(np.int64))
+    return np.bincount(mentions & 0xFFFFFFFF, minlength=n_entities)
+
+def association_measures(counts, src, dst, article_counts, n_articles):
+    """
+    Normalized association weights for entity pairs, vectorized over all
+    edges. counts are the article co-occurrence counts of each pair and
+    article_counts the number of articles mentioning each entity, so hubs
+    that appear in nearly every article are discounted.
+    """
+    c = counts.astype(np.float64)
+    n_src = article_counts[src].astype(np.float64)
+    n_dst = article_counts[dst].astype(np.float64)
+
+    lift = c * n_articles / (n_src * n_dst)
+
+    return {
+        'ppmi': np.maximum(np.log(lift), 0.0),
+        'jaccard': c / (n_src + n_dst - c),
+        'cosine': c / np.sqrt(n_src * n_dst),
+        'lift': lift,
+        # P(X >= c) for X ~ Hypergeometric(N articles, n_src, n_dst)
+        'hypergeom_p': hypergeom.sf(c - 1, n_articles, n_src, n_dst)
+    }
+
+def edges_from_matrix(C, entity_names=None, article_counts=None, n_articles=None):
+    """
+    Convert an upper-triangular co-occurrence matrix to a src,dst,weight
+    DataFrame in canonical (src, dst) order. Without entity_names the
+    src/dst columns stay as int32 entity ids. With per-entity article
+    counts the ASSOCIATION_MEASURES are added as extra columns.
+    """
+    C = sparse.coo_matrix(C)
+    order = np.lexsort((C.col, C.row))
+    src = C.row[order].astype(np.int32)
+    dst = C.col[order].astype(np.int32)
+    weight = C.data[order].astype(np.int64)
+
+    edges_df = pd.DataFrame({
+        'src': entity_names[src] if entity_names is not None else src,
+        'dst': entity_names[dst] if entity_names is not None else dst,
+        'weight': weight
+    })
+
+    if article_counts is not None:
+        for measure, values in association_measures(weight, src, dst, article_counts,
+                                                    n_articles).items():
+            edges_df[measure] = values
+
+    return edges_df
+
+def cooccurrence_edges(df, article_col='Article_ID', entity_col='Entity', binary=True,
+                       vocab=None, resolve_names=True, associations=False):
+    """
+    Create weighted co-occurrence edges from a node table (one row per
+    entity mention) using the sparse incidence matrix instead of pair loops.
+    With a vocabulary and resolve_names=False the edges keep int32 ids.
+    associations=True adds PPMI, Jaccard, cosine, lift and hypergeometric
+    p-value columns computed from the same matrix.
+    """
+    if associations and not binary:
+        raise ValueError("Association measures need article counts (binary=True)")
+
+    A, entity_names = build_incidence_matrix(df, article_col, entity_col, binary, vocab)
+    C = cooccurrence_matrix(A)
+
+    article_counts = None
+    if associations:
+        article_counts = np.asarray(A.sum(axis=0)).ravel()
+
+    return edges_from_matrix(C, entity_names if resolve_names else None,
+                             article_counts, A.shape[0])
+
+def _count_shard(args):
+    """Pool worker: upper-triangular pair counts for one shard of articles"""
+    article_codes, entity_codes, n_entities, binary = args
+    article_codes, articles = pd.factorize(article_codes)
+    A = incidence_from_codes(article_codes, entity_codes, len(articles), n_entities, binary)
+    C = cooccurrence_matrix(A)
+    return C.row, C.col, C.data
+
+def parallel_cooccurrence_edges(df, n_workers=None, article_col='Article_ID', entity_col='Entity',
+                                binary=True, vocab=None, resolve_names=True, associations=False):
+    """
+    Multiprocess version of cooccurrence_edges. Entities are coded once for
+    the whole table, articles are sharded by a hash of their Article_ID
+    across a process pool, and the per-shard pair counts are summed into one
+    edge table. The output is identical to the single-process path.
+    """
+    if associations and not binary:
+        raise ValueError("Association measures need article counts (binary=True)")
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    article_codes, entity_codes, n_articles, entity_names = code_mentions(
+        df, article_col, entity_col, vocab)
+    n_entities = len(entity_names)
+
+    # All mentions of an article land in the same shard
+    shard_ids = pd.util.hash_array(article_codes.astype(np.int64)) % n_workers
+    shards = [
+        (article_codes[shard_ids == shard], entity_codes[shard_ids == shard], n_entities, binary)
+        for shard in range(n_workers)
+    ]
+
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        results = list(pool.map(_count_shard, shards))
+
+    # Reduce the per-shard counters into one matrix
+    rows = np.concatenate([r for r, _, _ in results])
+    cols = np.concatenate([c for _, c, _ in results])
+    data = np.concatenate([d for _, _, d in results])
+    C = sparse.coo_matrix((data, (rows, cols)), shape=(n_entities, n_entities))
+    C.sum_duplicates()
+
+    article_counts = None
+    if associations:
+        article_counts = entity_article_counts(article_codes, entity_codes, n_entities)
+
+    return edges_from_matrix(C, entity_names if resolve_names else None,
+                             article_counts, n_articles)
+
+def _sum_by_key(keys, weights):
+    """
+    Collapse duplicate pair keys by summing their weights; returns sorted keys
+    """
+    if len(keys) == 0:
+        return keys, weights
+
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    weights = weights[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[starts], np.add.reduceat(weights, starts)
+
+def _iter_run(path, block_size=65536):
+    """Yield (key, weight) from a sorted on-disk run, one block at a time"""
+    run = np.load(path, mmap_mode='r')
+    for start in range(0, len(run), block_size):
+        block = np.asarray(run[start:start + block_size])
+        yield from zip(block['key'].tolist(), block['weight'].tolist())
+
+def _iter_article_chunks(nodes_file_path, article_col, chunksize):
+    """
+    Read a node table in chunks that never split an article. Rows of the
+    last article in each chunk are carried over into the next one, so the
+    file must keep each article's mentions contiguous.
+    """
+    carry = None
+    closed_articles = set()
+
+    for chunk in pd.read_csv(nodes_file_path, chunksize=chunksize):
+        chunk = chunk.dropna(subset=[article_col])
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        if chunk.empty:
+            continue
+
+        last_article = chunk[article_col].iloc[-1]
+        is_last = (chunk[article_col] == last_article).values
+        carry = chunk[is_last]
+        complete = chunk[~is_last]
+
+        articles = complete[article_col].unique()
+        if closed_articles.intersection(articles.tolist()):
+            raise ValueError(f"{nodes_file_path} is not grouped by {article_col}; "
+                             f"sort it by {article_col} before streaming")
+        closed_articles.update(articles.tolist())
+
+        if not complete.empty:
+            yield complete
+
+    if carry is not None and not carry.empty:
+        if carry[article_col].iloc[0] in closed_articles:
+            raise ValueError(f"{nodes_file_path} is not grouped by {article_col}; "
+                             f"sort it by {article_col} before streaming")
+        yield carry
+
+def stream_cooccurrence_edges(nodes_file_path, edges_file_path, chunksize=200000,
+                              memory_limit_mb=512, tmp_dir=None, vocab=None,
+                              article_col='Article_ID', entity_col='Entity', binary=True):
+    """
+    Out-of-core version of cooccurrence_edges for node tables larger than RAM.
+
+    The node file is read in article-aligned chunks and each chunk's pair
+    counts are accumulated in memory. Whenever the pending counts exceed
+    memory_limit_mb they are sorted and spilled to a run file in tmp_dir;
+    the runs are then k-way merged into the final src,dst,weight CSV.
+    """
+    if vocab is None:
+        vocab = EntityVocabulary([])
+    memory_limit = memory_limit_mb * 1024 * 1024
+    run_dir = tempfile.mkdtemp(prefix='cooccurrence_runs_', dir=tmp_dir)
+
+    pending_keys, pending_weights = [], []
+    pending_bytes = 0
+    run_paths = []
+
+    def spill():
+        keys, weights = _sum_by_key(np.concatenate(pending_keys), np.concatenate(pending_weights))
+        run = np.empty(len(keys), dtype=[('key', '<i8'), ('weight', '<i8')])
+        run['key'] = keys
+        run['weight'] = weights
+        path = os.path.join(run_dir, f"run_{len(run_paths):05d}.npy")
+        np.save(path, run)
+        run_paths.append(path)
+
+    try:
+        for chunk in _iter_article_chunks(nodes_file_path, article_col, chunksize):
+            vocab.extend(chunk[entity_col].dropna().values)
+            A, _ = build_incidence_matrix(chunk, article_col, entity_col, binary, vocab)
+            C = cooccurrence_matrix(A)
+
+            pending_keys.append((C.row.astype(np.int64) << 32) | C.col.astype(np.int64))
+            pending_weights.append(C.data.astype(np.int64))
+            pending_bytes += pending_keys[-1].nbytes + pending_weights[-1].nbytes
+
+            if pending_bytes > memory_limit:
+                spill()
+                pending_keys, pending_weights = [], []
+                pending_bytes = 0
+
+        if pending_keys:
+            spill()
+
+        print(f"Merging {len(run_paths)} sorted runs into {edges_file_path}")
+
+        # k-way merge of the sorted runs, summing weights of equal keys
+        names = vocab.names
+        header = True
+        batch_keys, batch_weights = [], []
+
+        def flush():
+            keys = np.array(batch_keys, dtype=np.int64)
+            src_names = names[keys >> 32]
+            dst_names = names[keys & 0xFFFFFFFF]
+            # Keep the lexicographic src < dst orientation of the in-memory path
+            swap = src_names > dst_names
+            pd.DataFrame({
+                'src': np.where(swap, dst_names, src_names),
+                'dst': np.where(swap, src_names, dst_names),
+                'weight': batch_weights
+            }).to_csv(edges_file_path, index=False, header=header, mode='w' if header else 'a')
+
+        edge_count = 0
+        current_key, current_weight = None, 0
+        for key, weight in heapq.merge(*[_iter_run(path) for path in run_paths]):
+            if key == current_key:
+                current_weight += weight
+                continue
+            if current_key is not None:
+                batch_keys.append(current_key)
+                batch_weights.append(current_weight)
+                edge_count += 1
+                if len(batch_keys) >= 100000:
+                    flush()
+                    header = False
+                    batch_keys, batch_weights = [], []
+            current_key, current_weight = key, weight
+
+        if current_key is not None:
+            batch_keys.append(current_key)
+            batch_weights.append(current_weight)
+            edge_count += 1
+        if batch_keys or header:
+            flush()
+
+        print(f"Created {edge_count} edges in {edges_file_path}")
+        return edge_count
+
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
@@ -0,0 +1,93 @@
+import pandas as pd
+import numpy as np
+import networkx as nx
+from scipy import sparse
+
+
+class CSRGraph:
+    """
+    Undirected weighted graph stored as a symmetric scipy CSR adjacency over
+    a node index. nodes[i] is the label (entity name or vocabulary id) of
+    row i, so per-node results can be kept as arrays aligned to the index.
+    """
+
+    def __init__(self, adjacency, nodes):
+        self.adjacency = sparse.csr_matrix(adjacency)
+        self.nodes = np.asarray(nodes, dtype=object)
+
+    @classmethod
+    def from_edges(cls, edges_df, src_col='src', dst_col='dst', weight='weight'):
+        """Build from an edge list; duplicate pairs are summed, self-loops dropped"""
+        edges_df = edges_df[edges_df[src_col] != edges_df[dst_col]]
+        codes, nodes = pd.factorize(pd.concat([edges_df[src_col], edges_df[dst_col]],
+                                              ignore_index=True), sort=True)
+        n_edges = len(edges_df)
+        src, dst = codes[:n_edges], codes[n_edges:]
+        weights = edges_df[weight].values.astype(np.float64) if weight else np.ones(n_edges)
+
+        adjacency = sparse.coo_matrix(
+            (np.r_[weights, weights], (np.r_[src, dst], np.r_[dst, src])),
+            shape=(len(nodes), len(nodes))
+        ).tocsr()
+        adjacency.sum_duplicates()
+        return cls(adjacency, nodes)
+
+    @classmethod
+    def from_networkx(cls, G, weight='weight'):
+        nodes = list(G.nodes())
+        adjacency = nx.to_scipy_sparse_array(G, nodelist=nodes, weight=weight, format='csr')
+        adjacency.setdiag(0)
+        adjacency.eliminate_zeros()
+        return cls(adjacency, nodes)
+
+    @property
+    def n_nodes(self):
+        return self.adjacency.shape[0]
+
+    @property
+    def n_edges(self):
+        return self.adjacency.nnz // 2
+
+    @property
+    def indptr(self):
+        return self.adjacency.indptr
+
+    @property
+    def indices(self):
+        return self.adjacency.indices
+
+    @property
+    def weights(self):
+        return self.adjacency.data
+
+    def degree(self):
+        return np.diff(self.adjacency.indptr)
+
+    def strength(self):
+        return np.asarray(self.adjacency.sum(axis=1)).ravel()
+
+    def node_index(self):
+        """Label -> row index mapping"""
+        return {node: i for i, node in enumerate(self.nodes)}
+
+    def upper_edges(self):
+        """(src, dst, weight) arrays of every edge once, with src < dst"""
+        upper = sparse.triu(self.adjacency, k=1, format='coo')
+        return upper.row, upper.col, upper.data
+
+    def to_edges_df(self):
+        src, dst, weight = self.upper_edges()
+        return pd.DataFrame({'src': self.nodes[src], 'dst': self.nodes[dst], 'weight': weight})
+
+    def to_networkx(self):
+        G = nx.Graph()
+        G.add_nodes_from(self.nodes.tolist())
+        src, dst, weight = self.upper_edges()
+        G.add_weighted_edges_from(zip(self.nodes[src].tolist(), self.nodes[dst].tolist(),
+                                      weight.tolist()))
+        return G
+
+    def subgraph(self, keep):
+        """Induced subgraph on a boolean mask or index array of nodes"""
+        keep = np.flatnonzero(keep) if np.asarray(keep).dtype == bool else np.asarray(keep)
+        return CSRGraph(self.adjacency[keep][:, keep], self.nodes[keep])
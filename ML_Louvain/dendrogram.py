@@ -0,0 +1,159 @@
+import numpy as np
+import json
+import community as louvain  # pip install python-louvain
+from scipy import sparse
+from csr_graph import CSRGraph
+
+
+class CommunityDendrogram:
+    """
+    Multi-level Louvain hierarchy of one graph, kept as one parent array per
+    level plus the aggregated super-graph of every level.
+
+    parents[0][i] is the level-0 community of node i, parents[l][c] the
+    level-l community of level-(l-1) community c. supergraphs[l] is the
+    community-by-community adjacency at level l (diagonal = weight inside
+    the community, counted in both directions), built as P^T A P from the
+    level below, so a viewer can start at the coarsest level and expand one
+    community at a time. community_ids[c] is the published id of level-0
+    community c (the label written to {prefix}_communities.csv).
+    """
+
+    def __init__(self, nodes, parents, supergraphs, community_ids=None):
+        self.nodes = np.asarray(nodes, dtype=object)
+        self.parents = [np.asarray(p, dtype=np.int32) for p in parents]
+        self.supergraphs = [sparse.csr_matrix(s) for s in supergraphs]
+        if community_ids is None:
+            community_ids = np.arange(self.supergraphs[0].shape[0] if self.supergraphs else 0)
+        self.community_ids = np.asarray(community_ids, dtype=np.int64)
+
+    @staticmethod
+    def _louvain_levels(adjacency, resolution, seed):
+        """python-louvain's generate_dendrogram on an adjacency, one parent array per level"""
+        G = CSRGraph(adjacency, np.arange(adjacency.shape[0])).to_networkx()
+        # The diagonal counts internal weight twice; python-louvain wants it once as a self-loop
+        G.add_weighted_edges_from((i, i, w / 2) for i, w in enumerate(adjacency.diagonal()) if w)
+        levels = louvain.generate_dendrogram(G, weight='weight', resolution=resolution,
+                                             random_state=seed)
+        return [np.fromiter((level[i] for i in range(len(level))), dtype=np.int32,
+                            count=len(level)) for level in levels]
+
+    @staticmethod
+    def _aggregate(adjacency, parent):
+        """Community-by-community adjacency P^T A P of one level"""
+        membership = sparse.csr_matrix(
+            (np.ones(len(parent)), (np.arange(len(parent)), parent)),
+            shape=(len(parent), parent.max() + 1))
+        return (membership.T @ adjacency @ membership).tocsr()
+
+    @classmethod
+    def from_graph(cls, graph, resolution=1.0, seed=0, labels=None):
+        """
+        Multi-level hierarchy of a CSRGraph. With labels (e.g. the consensus
+        partition) level 0 is exactly that partition, keeping its ids, and
+        the coarser levels come from python-louvain run on its super-graph.
+        Without labels every level comes from python-louvain's
+        generate_dendrogram on the graph.
+        """
+        community_ids = None
+        if labels is None:
+            parents = cls._louvain_levels(graph.adjacency, resolution, seed)
+        else:
+            community_ids, level0 = np.unique(labels, return_inverse=True)
+            parents = [level0.astype(np.int32)]
+            upper = cls._louvain_levels(cls._aggregate(graph.adjacency, parents[0]),
+                                        resolution, seed)
+            # A first level that merges nothing means the partition is already the top
+            if upper[0].max() + 1 < len(upper[0]):
+                parents += upper
+
+        supergraphs = []
+        adjacency = graph.adjacency
+        for parent in parents:
+            adjacency = cls._aggregate(adjacency, parent)
+            supergraphs.append(adjacency)
+
+        return cls(graph.nodes, parents, supergraphs, community_ids)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path, allow_pickle=True)
+        n_levels = int(data['n_levels'])
+        parents = [data[f'parent_{l}'] for l in range(n_levels)]
+        supergraphs = [
+            sparse.csr_matrix((data[f'data_{l}'], data[f'indices_{l}'], data[f'indptr_{l}']),
+                              shape=(len(data[f'indptr_{l}']) - 1,) * 2)
+            for l in range(n_levels)
+        ]
+        community_ids = data['community_ids'] if 'community_ids' in data.files else None
+        return cls(data['nodes'], parents, supergraphs, community_ids)
+
+    def save(self, path):
+        arrays = {'nodes': self.nodes, 'n_levels': len(self.parents),
+                  'community_ids': self.community_ids}
+        for l, (parent, supergraph) in enumerate(zip(self.parents, self.supergraphs)):
+            arrays[f'parent_{l}'] = parent
+            arrays[f'data_{l}'] = supergraph.data
+            arrays[f'indices_{l}'] = supergraph.indices
+            arrays[f'indptr_{l}'] = supergraph.indptr
+        np.savez_compressed(path, **arrays)
+
+    @property
+    def n_levels(self):
+        return len(self.parents)
+
+    def membership(self, level):
+        """Community of every original node at the given level"""
+        labels = self.parents[0]
+        for parent in self.parents[1:level + 1]:
+            labels = parent[labels]
+        return labels
+
+    def sizes(self, level):
+        """Number of original nodes in each community of a level"""
+        return np.bincount(self.membership(level), minlength=self.supergraphs[level].shape[0])
+
+    def children(self, level, community):
+        """
+        What a community expands into: the level-(level-1) communities it
+        contains, or the original node indices when level is 0
+        """
+        return np.flatnonzero(self.parents[level] == community)
+
+    def to_dict(self, node_labels=None):
+        """
+        JSON-ready hierarchy, coarsest level first. Every level lists its
+        communities (size, internal weight, parent in the level above) and
+        the super-graph edges between them; 'nodes' maps the original nodes
+        to their level-0 community. Level-0 ids are the community_ids.
+        """
+        if node_labels is None:
+            node_labels = self.nodes
+        levels = []
+        for l in reversed(range(self.n_levels)):
+            supergraph = self.supergraphs[l]
+            ids = self.community_ids if l == 0 else np.arange(supergraph.shape[0])
+            upper = sparse.triu(supergraph, k=1, format='coo')
+            parent = (self.parents[l + 1] if l + 1 < self.n_levels
+                      else np.full(supergraph.shape[0], -1, dtype=np.int32))
+            levels.append({
+                'level': l,
+                'communities': [
+                    {'id': int(ids[c]), 'size': int(size), 'internal_weight': float(internal) / 2,
+                     'parent': int(parent[c])}
+                    for c, (size, internal) in enumerate(zip(self.sizes(l), supergraph.diagonal()))
+                ],
+                'edges': [
+                    {'from': int(ids[i]), 'to': int(ids[j]), 'weight': float(w)}
+                    for i, j, w in zip(upper.row, upper.col, upper.data)
+                ]
+            })
+        return {
+            'levels': levels,
+            'nodes': [{'id': str(label), 'community': int(c)}
+                      for label, c in zip(node_labels, self.community_ids[self.parents[0]])]
+        }
+
+    def save_json(self, path, node_labels=None):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(node_labels), f, ensure_ascii=False)
@@ -0,0 +1,120 @@
+import pandas as pd
+import numpy as np
+import os
+
+
+class EntityVocabulary:
+    """
+    Persistent string <-> int32 id mapping for entities, with the entity type
+    and jurisdiction carried alongside. Built once from final_nodes.csv and
+    reused by every downstream stage so edges, partitions and metrics can be
+    kept as integer arrays and names resolved only at export time.
+    """
+
+    def __init__(self, names, entity_types=None, jurisdictions=None):
+        names = np.asarray(names, dtype=object)
+        self.table = pd.DataFrame({
+            'entity_id': np.arange(len(names), dtype=np.int32),
+            'Entity': names,
+            'Entity_Type': entity_types if entity_types is not None else 'Unknown',
+            'Jurisdiction': jurisdictions if jurisdictions is not None else 'Unknown'
+        })
+        self._index = pd.Index(names)
+
+    @classmethod
+    def from_dataframe(cls, df, entity_col='Entity', type_col='Entity_Type',
+                       jurisdiction_col='Jurisdiction'):
+        """
+        Build the vocabulary from a node table. Ids follow the sorted entity
+        names, so id order and name order agree for canonical src < dst edges.
+        """
+        df = df.dropna(subset=[entity_col])
+        first = df.drop_duplicates(subset=[entity_col]).sort_values(entity_col)
+
+        entity_types = None
+        if type_col in first.columns:
+            entity_types = first[type_col].fillna('Unknown').values
+
+        jurisdictions = None
+        if jurisdiction_col in first.columns:
+            jurisdictions = first[jurisdiction_col].fillna('Unknown').astype(str).str.strip().values
+
+        return cls(first[entity_col].values, entity_types, jurisdictions)
+
+    @classmethod
+    def load(cls, path='entity_vocabulary.csv'):
+        """Load a vocabulary written by save()"""
+        table = pd.read_csv(path, encoding='utf-8').sort_values('entity_id')
+        return cls(table['Entity'].values, table['Entity_Type'].values,
+                   table['Jurisdiction'].values)
+
+    @classmethod
+    def load_if_exists(cls, path='entity_vocabulary.csv'):
+        """Load the shared vocabulary, or return None if it was never built"""
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            return cls.load(path)
+        return None
+
+    def save(self, path='entity_vocabulary.csv'):
+        """Write the vocabulary as entity_id, Entity, Entity_Type, Jurisdiction"""
+        self.table.to_csv(path, index=False, encoding='utf-8')
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def names(self):
+        return self.table['Entity'].values
+
+    def encode(self, values):
+        """Map entity names to int32 ids; unknown names map to -1"""
+        return self._index.get_indexer(np.asarray(values, dtype=object)).astype(np.int32)
+
+    def decode(self, ids):
+        """Map int ids back to entity names"""
+        return self.names[np.asarray(ids, dtype=np.int64)]
+
+    def attribute(self, column, ids=None):
+        """Look up a vocabulary column (Entity_Type, Jurisdiction) by id"""
+        values = self.table[column].values
+        return values if ids is None else values[np.asarray(ids, dtype=np.int64)]
+
+    def extend(self, values):
+        """
+        Append entities not yet in the vocabulary and return how many were
+        added. Existing ids never change.
+        """
+        values = pd.unique(np.asarray(values, dtype=object))
+        new_names = [v for v in values if v not in self._index and not pd.isna(v)]
+        if not new_names:
+            return 0
+
+        start = len(self.table)
+        additions = pd.DataFrame({
+            'entity_id': np.arange(start, start + len(new_names), dtype=np.int32),
+            'Entity': new_names,
+            'Entity_Type': 'Unknown',
+            'Jurisdiction': 'Unknown'
+        })
+        self.table = pd.concat([self.table, additions], ignore_index=True)
+        self._index = pd.Index(self.table['Entity'].values)
+        return len(new_names)
+
+    def extend_from_dataframe(self, df, entity_col='Entity', type_col='Entity_Type',
+                              jurisdiction_col='Jurisdiction'):
+        """
+        Append the entities of a node table that are not yet in the
+        vocabulary, with their type and jurisdiction, and return how many
+        were added. Existing ids never change.
+        """
+        additions = self.from_dataframe(df, entity_col, type_col, jurisdiction_col).table
+        additions = additions[~additions['Entity'].isin(self._index)]
+        if additions.empty:
+            return 0
+
+        start = len(self.table)
+        additions = additions.assign(
+            entity_id=np.arange(start, start + len(additions), dtype=np.int32))
+        self.table = pd.concat([self.table, additions], ignore_index=True)
+        self._index = pd.Index(self.table['Entity'].values)
+        return len(additions)
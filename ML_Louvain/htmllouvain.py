@@ -13,6 +13,12 @@ import os
 import json
 from datetime import datetime
 import re
+from community_backends import detect_networkx_communities
+from centrality import networkx_centrality
+from csr_graph import CSRGraph
+from brokerage import burt_measures
+from kcore import innermost_nodes, onion_decomposition
+from cache import MetricsCache
 warnings.filterwarnings('ignore')
 
 # Set style for matplotlib
@@ -41,6 +47,12 @@ class TemporalNetworkVisualizer:
         self.max_nodes = 120  # Optimized for performance
         self.min_edge_weight = 3
         self.max_edges = 350
+        
+        # Community detection backend: 'louvain', 'leiden' or 'networkx'
+        self.community_method = 'networkx'
+        
+        # Partitions and centralities keyed by a hash of the edge list
+        self.metrics_cache = MetricsCache('.metrics_cache')
     
     def check_file_exists(self, filename):
         """Check if file exists and is not empty"""
@@ -183,6 +195,12 @@ class TemporalNetworkVisualizer:
                     if count >= self.min_edge_weight
                 ]
             
+            # k-core and onion layer of every entity on the full co-occurrence
+            # graph, before the display cap below
+            full_graph = CSRGraph.from_edges(pd.DataFrame(filtered_edges))
+            core, layer = onion_decomposition(full_graph)
+            peeling = pd.DataFrame({'core': core, 'layer': layer}, index=full_graph.nodes)
+            
             # Limit edges for performance
             if len(filtered_edges) > self.max_edges:
                 filtered_edges = sorted(filtered_edges, key=lambda x: x['weight'], reverse=True)[:self.max_edges]
@@ -198,15 +216,25 @@ class TemporalNetworkVisualizer:
             if G.number_of_nodes() == 0:
                 return None, None, None
             
-            # Community detection with error handling
-            communities = []
+            # Community detection with error handling, cached by graph content;
+            # the connected-components fallback is never stored in the cache
+            def compute_communities():
+                communities = detect_networkx_communities(G, self.community_method, resolution=1.0, seed=42)
+                print(f"{self.community_method.capitalize()} found {len(communities)} communities")
+                return {'community': {node: i for i, community in enumerate(communities)
+                                      for node in community}}
+            
             try:
-                import networkx.algorithms.community as nx_comm
-                communities = list(nx_comm.louvain_communities(G, seed=42, resolution=1.0))
-                print(f"Louvain found {len(communities)} communities")
+                community_map = self.metrics_cache.node_metrics(
+                    G, 'htmllouvain_communities', compute_communities,
+                    method=self.community_method, resolution=1.0, seed=42)['community']
             except Exception as e:
-                print(f"Louvain failed ({e}), using connected components")
-                communities = list(nx.connected_components(G))
+                print(f"{self.community_method.capitalize()} failed ({e}), using connected components")
+                community_map = {node: i for i, component in enumerate(nx.connected_components(G))
+                                 for node in component}
+            communities = [set() for _ in range(max(community_map.values()) + 1)]
+            for node, i in community_map.items():
+                communities[i].add(node)
             
             # Create community dataframe
             communities_data = []
@@ -214,7 +242,7 @@ class TemporalNetworkVisualizer:
                 for node in community:
                     communities_data.append({'node': node, 'community': i})
             
-            communities_df = pd.DataFrame(communities_data)
+            communities_df = pd.DataFrame(communities_data).join(peeling, on='node')
             
             # Community statistics
             community_stats = []
@@ -253,12 +281,22 @@ class TemporalNetworkVisualizer:
             
             # Limit nodes for guaranteed performance
             if G.number_of_nodes() > self.max_nodes:
-                # Select most connected nodes
-                node_degrees = dict(G.degree())
-                top_nodes = sorted(node_degrees.items(), key=lambda x: x[1], reverse=True)[:self.max_nodes]
-                selected_nodes = [node for node, _ in top_nodes]
-                G = G.subgraph(selected_nodes)
-                print(f"Limited to {len(selected_nodes)} most connected nodes")
+                # Keep the innermost k-cores, cutting the last one by onion
+                # layer. Cores come from the full co-occurrence graph when the
+                # communities file carries them, else from the edges given
+                if communities_df is not None and {'core', 'layer'} <= set(communities_df.columns):
+                    nodes = np.array(list(G.nodes()), dtype=object)
+                    peeling = communities_df.set_index('node').reindex(nodes)
+                    core = peeling['core'].fillna(0).values.astype(np.int64)
+                    layer = peeling['layer'].fillna(0).values.astype(np.int64)
+                else:
+                    graph = CSRGraph.from_networkx(G)
+                    nodes = graph.nodes
+                    core, layer = onion_decomposition(graph)
+                selected = innermost_nodes(core, layer, self.max_nodes)
+                G = G.subgraph(nodes[selected].tolist())
+                print(f"Limited to {len(selected)} nodes of the innermost cores "
+                      f"(k >= {core[selected].min()})")
             
             # Get community mapping with validation
             community_dict = {}
@@ -270,10 +308,15 @@ class TemporalNetworkVisualizer:
             # Calculate centrality metrics
             try:
                 degree_centrality = nx.degree_centrality(G)
-                betweenness_centrality = nx.betweenness_centrality(G, k=min(30, len(G.nodes())))
+                betweenness_centrality = self.metrics_cache.node_metrics(
+                    G, 'htmllouvain_betweenness',
+                    lambda: {'betweenness': networkx_centrality(G, epsilon=0.02)[0]},
+                    epsilon=0.02)['betweenness']
+                brokerage = burt_measures(CSRGraph.from_networkx(G))
             except:
                 degree_centrality = {node: G.degree(node) / max(1, len(G.nodes()) - 1) for node in G.nodes()}
                 betweenness_centrality = {node: 0 for node in G.nodes()}
+                brokerage = None
             
             # Create PyVis network with minimal configuration for stability
             net = Network(
@@ -315,6 +358,8 @@ class TemporalNetworkVisualizer:
                     degree = G.degree(node)
                     centrality = degree_centrality.get(node, 0)
                     betweenness = betweenness_centrality.get(node, 0)
+                    constraint = float(brokerage.at[node, 'constraint']) if brokerage is not None else 0.0
+                    effective_size = float(brokerage.at[node, 'effective_size']) if brokerage is not None else 0.0
                     
                     # Safe color assignment
                     color = self.colors[int(community) % len(self.colors)]
@@ -329,7 +374,9 @@ class TemporalNetworkVisualizer:
                     title = (f"Entity: {node_id}\\n"
                            f"Community: {community}\\n"
                            f"Connections: {degree}\\n"
-                           f"Centrality: {centrality:.3f}")
+                           f"Centrality: {centrality:.3f}\\n"
+                           f"Constraint: {constraint:.3f}\\n"
+                           f"Effective size: {effective_size:.1f}")
                     
                     # Add node with validated properties
                     net.add_node(
@@ -340,7 +387,9 @@ class TemporalNetworkVisualizer:
                         size=int(size),
                         community=int(community),
                         degree=int(degree),
-                        centrality=float(centrality)
+                        centrality=float(centrality),
+                        constraint=constraint,
+                        effective_size=effective_size
                     )
                     node_count += 1
                     
@@ -0,0 +1,128 @@
+import pandas as pd
+import sqlite3
+import sys
+from cooccurrence import cooccurrence_edges
+from periods import PERIOD_DATES
+
+
+class CooccurrenceStore:
+    """
+    Persistent per-period co-occurrence weights that can be updated with
+    newly scraped articles instead of rebuilding every edge list.
+
+    The store keeps the edge weights and the set of already-counted
+    Article_IDs in SQLite. Adding articles only touches the pairs of the new
+    articles, and articles that were counted before are skipped, so
+    re-ingesting the same mentions is a no-op.
+    """
+
+    def __init__(self, db_path='cooccurrence_store.db'):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                article_id TEXT PRIMARY KEY,
+                period TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS edges (
+                period TEXT NOT NULL,
+                src TEXT NOT NULL,
+                dst TEXT NOT NULL,
+                weight INTEGER NOT NULL,
+                PRIMARY KEY (period, src, dst)
+            ) WITHOUT ROWID;
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def counted_articles(self, article_ids):
+        """Return the subset of article_ids that are already in the store"""
+        article_ids = [str(a) for a in pd.unique(pd.Series(article_ids).dropna())]
+        if not article_ids:
+            return set()
+
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS incoming (article_id TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM incoming")
+        self.conn.executemany("INSERT OR IGNORE INTO incoming VALUES (?)",
+                              ((a,) for a in article_ids))
+        rows = self.conn.execute(
+            "SELECT article_id FROM incoming JOIN articles USING (article_id)").fetchall()
+        return {row[0] for row in rows}
+
+    def add_articles(self, df, period):
+        """
+        Add the pair counts of articles not yet counted for a period.
+        Returns (new_articles, updated_edges).
+        """
+        df = df.dropna(subset=['Article_ID', 'Entity'])
+        already_counted = self.counted_articles(df['Article_ID'])
+        new_df = df[~df['Article_ID'].astype(str).isin(already_counted)]
+
+        if new_df.empty:
+            return 0, 0
+
+        edges_df = cooccurrence_edges(new_df, 'Article_ID', 'Entity')
+        new_articles = pd.unique(new_df['Article_ID'].astype(str))
+
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO edges (period, src, dst, weight) VALUES (?, ?, ?, ?)
+                ON CONFLICT (period, src, dst) DO UPDATE SET weight = weight + excluded.weight
+            """, ((period, str(src), str(dst), int(weight))
+                  for src, dst, weight in zip(edges_df['src'], edges_df['dst'], edges_df['weight'])))
+            self.conn.executemany("INSERT INTO articles (article_id, period) VALUES (?, ?)",
+                                  ((a, period) for a in new_articles))
+
+        return len(new_articles), len(edges_df)
+
+    def edges(self, period):
+        """Current src,dst,weight edge list of a period"""
+        return pd.read_sql_query(
+            "SELECT src, dst, weight FROM edges WHERE period = ? ORDER BY src, dst",
+            self.conn, params=(period,))
+
+    def export_edges(self, period, edges_file_path=None):
+        """Write a period's edges to {period}_edges.csv"""
+        if edges_file_path is None:
+            edges_file_path = f"{period}_edges.csv"
+        edges_df = self.edges(period)
+        edges_df.to_csv(edges_file_path, index=False)
+        print(f"Exported {len(edges_df)} edges to {edges_file_path}")
+        return edges_df
+
+    def ingest_nodes_file(self, nodes_file_path, period_dates=None, export=True):
+        """
+        Split new mentions by period, add the articles that were not counted
+        before and re-export the edge lists of the periods that changed
+        """
+        if period_dates is None:
+            period_dates = PERIOD_DATES
+
+        df = pd.read_csv(nodes_file_path)
+        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+
+        changed_periods = []
+        for period, (start_date, end_date) in period_dates.items():
+            period_df = df[(df['Date'] >= pd.to_datetime(start_date)) &
+                           (df['Date'] <= pd.to_datetime(end_date))]
+            if period_df.empty:
+                continue
+
+            new_articles, updated_edges = self.add_articles(period_df, period)
+            print(f"{period}: {new_articles} new articles, {updated_edges} edges updated")
+            if new_articles:
+                changed_periods.append(period)
+
+        if export:
+            for period in changed_periods:
+                self.export_edges(period)
+
+        return changed_periods
+
+# Usage: python incremental_store.py new_nodes.csv
+if __name__ == "__main__":
+    nodes_file = sys.argv[1] if len(sys.argv) > 1 else "final_nodes.csv"
+    store = CooccurrenceStore()
+    store.ingest_nodes_file(nodes_file)
+    store.close()
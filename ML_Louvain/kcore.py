@@ -0,0 +1,121 @@
+import pandas as pd
+import numpy as np
+import os
+from csr_graph import CSRGraph
+
+
+def onion_decomposition(graph):
+    """
+    Core number and onion layer (Hébert-Dufresne et al. 2016) of every node
+    of a CSRGraph by batch peeling: each round removes every remaining node
+    whose residual degree is at most the current core k.
+
+    Only the neighbours of the removed nodes are touched in a round: their
+    degrees drop, those that fall to k or below form the next round, and
+    the others are filed in a bucket by their new degree. When a round
+    removes nothing more, k moves up to the next non-empty bucket (the
+    initial degrees, bin-sorted, plus the lazily filed nodes, as in
+    Batagelj-Zaversnik). Every bucket is read once, so the work is O(n + m)
+    apart from grouping each round's touched neighbours by degree.
+
+    Returns (core, layer) int arrays aligned to graph.nodes.
+    """
+    n = graph.n_nodes
+    indptr, indices = graph.indptr, graph.indices
+    degree = graph.degree().astype(np.int64)
+    alive = np.ones(n, dtype=bool)
+    core = np.zeros(n, dtype=np.int32)
+    layer = np.zeros(n, dtype=np.int32)
+    if n == 0:
+        return core, layer
+
+    # Bin sort of the initial degrees; bucket d is order[bounds[d]:bounds[d + 1]]
+    order = np.argsort(degree, kind='stable')
+    bounds = np.searchsorted(degree[order], np.arange(degree.max() + 2))
+    filed = {}
+
+    k, current_layer, n_removed = -1, 0, 0
+    removed = np.zeros(0, dtype=np.int64)
+    while n_removed < n:
+        while not len(removed):
+            k += 1
+            candidates = np.concatenate([order[bounds[k]:bounds[k + 1]]] + filed.pop(k, []))
+            removed = np.unique(candidates[alive[candidates] & (degree[candidates] == k)])
+
+        current_layer += 1
+        core[removed] = k
+        layer[removed] = current_layer
+        alive[removed] = False
+        n_removed += len(removed)
+
+        # Neighbour lists of the removed rows, gathered straight from the CSR arrays
+        lengths = indptr[removed + 1] - indptr[removed]
+        offsets = np.repeat(indptr[removed] - np.cumsum(lengths) + lengths, lengths)
+        neighbours = indices[offsets + np.arange(lengths.sum())]
+        touched, drops = np.unique(neighbours[alive[neighbours]], return_counts=True)
+        degree[touched] -= drops
+        peeled = degree[touched] <= k
+        removed = touched[peeled]
+
+        # File the rest under their new degree for when k reaches it
+        higher = touched[~peeled]
+        grouped = np.argsort(degree[higher], kind='stable')
+        values, starts = np.unique(degree[higher][grouped], return_index=True)
+        for value, nodes in zip(values.tolist(), np.split(higher[grouped], starts[1:])):
+            filed.setdefault(value, []).append(nodes)
+
+    return core, layer
+
+def core_numbers(graph):
+    """k-core number of every node (same as networkx.core_number)"""
+    return onion_decomposition(graph)[0]
+
+def innermost_nodes(core, layer, max_nodes):
+    """
+    Indices of at most max_nodes nodes taken from the innermost cores
+    outward. Whole cores are kept while they fit; the core that does not
+    fit is cut at its deepest onion layers.
+    """
+    order = np.lexsort((-layer, -core))
+    return np.sort(order[:max_nodes])
+
+def decompose_periods(periods=None, weight='weight', output_dir='.'):
+    """
+    k-core and onion decomposition of every period's full {period}_edges.csv,
+    written to {period}_kcore.csv (node, core, layer) plus a per-period
+    kcore_summary.csv
+    """
+    if periods is None:
+        periods = ['pre_crimea', 'post_crimea', 'covid', 'war']
+
+    summary = []
+    for period in periods:
+        edges_file = os.path.join(output_dir, f"{period}_edges.csv")
+        if not os.path.exists(edges_file):
+            print(f"Skipping {period}: {edges_file} not found")
+            continue
+
+        graph = CSRGraph.from_edges(pd.read_csv(edges_file), weight=weight)
+        core, layer = onion_decomposition(graph)
+        pd.DataFrame({'node': graph.nodes, 'core': core, 'layer': layer}).to_csv(
+            os.path.join(output_dir, f"{period}_kcore.csv"), index=False)
+
+        max_core = int(core.max()) if len(core) else 0
+        summary.append({
+            'period': period,
+            'nodes': graph.n_nodes,
+            'edges': graph.n_edges,
+            'max_core': max_core,
+            'max_core_size': int((core == max_core).sum()),
+            'layers': int(layer.max()) if len(layer) else 0
+        })
+        print(f"{period}: max core {max_core} ({summary[-1]['max_core_size']} nodes), "
+              f"{summary[-1]['layers']} onion layers")
+
+    summary_df = pd.DataFrame(summary)
+    if not summary_df.empty:
+        summary_df.to_csv(os.path.join(output_dir, "kcore_summary.csv"), index=False)
+    return summary_df
+
+if __name__ == "__main__":
+    decompose_periods()
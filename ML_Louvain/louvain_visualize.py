@@ -12,6 +12,9 @@ import warnings
 import os
 import json
 import re
+from cache import MetricsCache
+from csr_graph import CSRGraph
+from brokerage import burt_measures
 warnings.filterwarnings('ignore')
 
 class TemporalNetworkVisualizer:
@@ -30,6 +33,9 @@ class TemporalNetworkVisualizer:
         self.max_nodes = 80   # Reduced for better performance
         self.min_edge_weight = 3
         self.max_edges = 250  # Reduced for faster loading
+        
+        # Partitions keyed by a hash of the edge list
+        self.metrics_cache = MetricsCache('.metrics_cache')
     
     def check_file_exists(self, filename):
         """Check if file exists and is not empty"""
@@ -117,22 +123,27 @@ class TemporalNetworkVisualizer:
             # Create graph and communities
             G = nx.from_pandas_edgelist(edges_df, 'src', 'dst', edge_attr='weight')
             
-            # Simple community detection
-            try:
+            # Simple community detection, cached by graph content; the
+            # connected-components fallback is never stored in the cache
+            def compute_communities():
                 import networkx.algorithms.community as nx_comm
                 communities = list(nx_comm.louvain_communities(G, seed=42))
-            except:
-                communities = list(nx.connected_components(G))
+                return {'community': {node: i for i, community in enumerate(communities)
+                                      for node in community}}
             
-            # Create community dataframe
-            communities_data = []
-            for i, community in enumerate(communities):
-                for node in community:
-                    communities_data.append({'node': node, 'community': i})
+            try:
+                community_map = self.metrics_cache.node_metrics(
+                    G, 'louvain_visualize_communities', compute_communities, seed=42)['community']
+            except Exception as e:
+                print(f"Louvain failed ({e}), using connected components")
+                community_map = {node: i for i, component in enumerate(nx.connected_components(G))
+                                 for node in component}
             
-            communities_df = pd.DataFrame(communities_data)
+            # Create community dataframe
+            communities_df = pd.DataFrame({'node': list(community_map.keys()),
+                                           'community': list(community_map.values())})
             
-            print(f"Created network: {len(G.nodes())} nodes, {len(edges_df)} edges, {len(communities)} communities")
+            print(f"Created network: {len(G.nodes())} nodes, {len(edges_df)} edges, {len(set(community_map.values()))} communities")
             return edges_df, communities_df, None
             
         except Exception as e:
@@ -179,21 +190,33 @@ class TemporalNetworkVisualizer:
             }
             """)
             
+            # Burt's structural holes for the tooltips
+            try:
+                brokerage = burt_measures(CSRGraph.from_networkx(G))
+            except Exception as e:
+                print(f"Brokerage measures failed ({e}), leaving them at 0")
+                brokerage = None
+            
             # Add nodes
             for node in G.nodes():
                 community = community_dict.get(node, 0)
                 degree = G.degree(node)
                 color = self.colors[community % len(self.colors)]
                 size = max(15, min(35, 15 + degree * 2))
+                constraint = float(brokerage.at[node, 'constraint']) if brokerage is not None else 0.0
+                effective_size = float(brokerage.at[node, 'effective_size']) if brokerage is not None else 0.0
                 
                 net.add_node(
                     str(node),
                     label=str(node)[:20],
                     color=color,
                     size=size,
-                    title=f"Entity: {node}\\nCommunity: {community}\\nConnections: {degree}",
+                    title=(f"Entity: {node}\\nCommunity: {community}\\nConnections: {degree}\\n"
+                           f"Constraint: {constraint:.3f}\\nEffective size: {effective_size:.1f}"),
                     community=community,
-                    degree=degree
+                    degree=degree,
+                    constraint=constraint,
+                    effective_size=effective_size
                 )
             
             # Add edges
@@ -0,0 +1,79 @@
+import numpy as np
+import os
+from concurrent.futures import ProcessPoolExecutor
+from scipy import sparse
+from csr_graph import CSRGraph
+from community_backends import get_backend
+
+# Backend graph prepared once per worker process by _init_worker
+_worker_graph = None
+_worker_run = None
+
+
+def _init_worker(indptr, indices, data, n_nodes, method):
+    """Pool initializer: receive the CSR arrays once and prepare the backend graph"""
+    global _worker_graph, _worker_run
+    adjacency = sparse.csr_matrix((data, indices, indptr), shape=(n_nodes, n_nodes))
+    prepare, _worker_run = get_backend(method)
+    _worker_graph = prepare(CSRGraph(adjacency, np.arange(n_nodes)))
+
+def _run_seed(args):
+    """Pool worker: one community detection run, returned as an int32 label array"""
+    seed, resolution, initial = args
+    return _worker_run(_worker_graph, resolution=resolution, seed=seed, initial=initial)
+
+def label_modularity(graph, labels, resolution=1.0):
+    """
+    Newman modularity of an int label array on a CSRGraph, vectorized over
+    the adjacency instead of walking a partition dict
+    """
+    adjacency = graph.adjacency.tocoo()
+    two_m = adjacency.data.sum()
+    if two_m == 0:
+        return 0.0
+
+    internal = adjacency.data[labels[adjacency.row] == labels[adjacency.col]].sum()
+    community_strength = np.bincount(labels, weights=graph.strength())
+    return internal / two_m - resolution * np.sum((community_strength / two_m) ** 2)
+
+def run_community_tasks(graph, tasks, n_workers=None, method='louvain'):
+    """
+    Run (seed, resolution, initial) community detection tasks on one graph
+    across a process pool. The graph is shipped to each worker once as CSR
+    arrays and converted to the backend's graph type once per worker.
+    Returns an int32 label array (aligned to graph.nodes) per task.
+    """
+    tasks = list(tasks)
+    if n_workers is None:
+        n_workers = min(len(tasks), os.cpu_count() or 1)
+
+    adjacency = graph.adjacency
+    init_args = (adjacency.indptr, adjacency.indices, adjacency.data, graph.n_nodes, method)
+
+    if n_workers <= 1:
+        _init_worker(*init_args)
+        return [_run_seed(task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                             initargs=init_args) as pool:
+        return list(pool.map(_run_seed, tasks))
+
+def run_louvain_seeds(graph, n_runs=10, resolution=1.0, n_workers=None, seeds=None,
+                      method='louvain', initial=None):
+    """
+    Run Louvain with n_runs random seeds across a process pool (see
+    run_community_tasks); every run comes back as an int32 label array
+    aligned to graph.nodes. method picks the
+    community_backends engine (louvain, leiden, networkx); initial is an
+    optional int label array every run starts its local moving from.
+
+    Returns (labels, modularities) with labels of shape (n_runs, n_nodes).
+    """
+    if seeds is None:
+        seeds = range(n_runs)
+    tasks = [(seed, resolution, initial) for seed in seeds]
+    runs = run_community_tasks(graph, tasks, n_workers, method)
+
+    labels = np.vstack(runs) if runs else np.empty((0, graph.n_nodes), dtype=np.int32)
+    modularities = np.array([label_modularity(graph, run, resolution) for run in labels])
+    return labels, modularities
@@ -0,0 +1,120 @@
+import pandas as pd
+import numpy as np
+import os
+from scipy import sparse
+
+SIMILARITY_METRICS = ['nmi', 'ari', 'vi']
+
+
+def contingency_table(labels_a, labels_b):
+    """Sparse contingency table of two int label arrays over the same nodes"""
+    _, a = np.unique(labels_a, return_inverse=True)
+    _, b = np.unique(labels_b, return_inverse=True)
+    return sparse.coo_matrix((np.ones(len(a)), (a, b)),
+                             shape=(a.max() + 1, b.max() + 1)).tocsr()
+
+def _entropy(counts, n):
+    p = counts[counts > 0] / n
+    return -np.sum(p * np.log(p))
+
+def _pairs(counts):
+    return np.sum(counts * (counts - 1) / 2)
+
+def partition_scores(labels_a, labels_b):
+    """
+    NMI, ARI and variation of information of two partitions of the same
+    nodes from one sparse contingency table, so the cost is linear in the
+    node count. Returns {'nmi', 'ari', 'vi'}; NMI uses arithmetic-mean
+    normalization and VI is in nats. With no nodes in common there is
+    nothing to compare and every score is NaN.
+    """
+    n = len(labels_a)
+    if n == 0:
+        return {'nmi': np.nan, 'ari': np.nan, 'vi': np.nan}
+
+    table = contingency_table(labels_a, labels_b).tocoo()
+    row_sums = np.asarray(table.sum(axis=1)).ravel()
+    col_sums = np.asarray(table.sum(axis=0)).ravel()
+
+    # Information-theoretic scores
+    h_a = _entropy(row_sums, n)
+    h_b = _entropy(col_sums, n)
+    joint = table.data / n
+    mutual_info = max(np.sum(joint * np.log(joint * n * n /
+                                            (row_sums[table.row] * col_sums[table.col]))), 0.0)
+    nmi = 1.0 if h_a + h_b == 0 else mutual_info / ((h_a + h_b) / 2)
+    vi = max(h_a + h_b - 2 * mutual_info, 0.0)
+
+    # Pair-counting score
+    index = _pairs(table.data)
+    pairs_a, pairs_b = _pairs(row_sums), _pairs(col_sums)
+    expected = pairs_a * pairs_b / (n * (n - 1) / 2) if n > 1 else 0.0
+    max_index = (pairs_a + pairs_b) / 2
+    ari = 1.0 if max_index == expected else (index - expected) / (max_index - expected)
+
+    return {'nmi': float(nmi), 'ari': float(ari), 'vi': float(vi)}
+
+def normalized_mutual_info(labels_a, labels_b):
+    """Normalized mutual information of two partitions (1 = identical up to relabelling)"""
+    return partition_scores(labels_a, labels_b)['nmi']
+
+def adjusted_rand_index(labels_a, labels_b):
+    """Adjusted Rand index of two partitions (1 = identical, ~0 = chance agreement)"""
+    return partition_scores(labels_a, labels_b)['ari']
+
+def variation_of_information(labels_a, labels_b):
+    """Variation of information of two partitions in nats (0 = identical)"""
+    return partition_scores(labels_a, labels_b)['vi']
+
+def _align(partition_a, partition_b):
+    """Label arrays of two {node: community} partitions over their shared nodes"""
+    shared = pd.Index(list(partition_a)).intersection(pd.Index(list(partition_b)))
+    return (np.array([partition_a[node] for node in shared]),
+            np.array([partition_b[node] for node in shared]))
+
+def pairwise_similarity(partitions, names=None):
+    """
+    Pairwise NMI, ARI and VI matrices of many partitions in one call.
+
+    partitions is either a 2-D label array (one run per row, all over the
+    same nodes) or a list/dict of {node: community} partitions, e.g. one per
+    period, which are compared on the nodes each pair shares.
+
+    Returns {metric: DataFrame} with partitions as rows and columns.
+    """
+    if isinstance(partitions, dict):
+        names = list(partitions) if names is None else names
+        partitions = list(partitions.values())
+    if names is None:
+        names = list(range(len(partitions)))
+
+    k = len(partitions)
+    matrices = {metric: np.zeros((k, k)) for metric in SIMILARITY_METRICS}
+    for i in range(k):
+        for j in range(i, k):
+            if isinstance(partitions[i], dict):
+                labels_a, labels_b = _align(partitions[i], partitions[j])
+            else:
+                labels_a, labels_b = partitions[i], partitions[j]
+
+            scores = partition_scores(labels_a, labels_b)
+            for metric, value in scores.items():
+                matrices[metric][i, j] = matrices[metric][j, i] = value
+
+    return {metric: pd.DataFrame(matrix, index=names, columns=names)
+            for metric, matrix in matrices.items()}
+
+def mean_pairwise_scores(matrices):
+    """Mean off-diagonal value of each pairwise matrix, skipping pairs without shared nodes"""
+    means = {}
+    for metric, matrix in matrices.items():
+        values = matrix.values
+        off_diagonal = values[~np.eye(len(values), dtype=bool)]
+        off_diagonal = off_diagonal[~np.isnan(off_diagonal)]
+        means[metric] = float(off_diagonal.mean()) if len(off_diagonal) else np.nan
+    return means
+
+def save_similarity_matrices(matrices, prefix, output_dir='.'):
+    """Write each matrix to {prefix}_{metric}.csv"""
+    for metric, matrix in matrices.items():
+        matrix.to_csv(os.path.join(output_dir, f"{prefix}_{metric}.csv"))
@@ -0,0 +1,120 @@
+import numpy as np
+from scipy.sparse import csgraph
+from scipy.stats import norm
+
+
+def largest_component(graph):
+    """CSRGraph of the largest connected component"""
+    _, component = csgraph.connected_components(graph.adjacency, directed=False)
+    return graph.subgraph(component == np.argmax(np.bincount(component)))
+
+def bfs(graph, sources, return_predecessors=False):
+    """Unweighted hop distances (and predecessors) from each source, one row per source"""
+    return csgraph.shortest_path(graph.adjacency, method='D', directed=False, unweighted=True,
+                                 indices=sources, return_predecessors=return_predecessors)
+
+def four_sweep(graph, start=None):
+    """
+    Two chained double sweeps (Crescenzi et al.). Returns (root, lower_bound):
+    the middle node of the last long path, a good iFUB root, and the longest
+    eccentricity seen, a diameter lower bound.
+    """
+    if start is None:
+        start = int(np.argmax(graph.degree()))
+
+    lower_bound = 0
+    for _ in range(2):
+        dist = bfs(graph, start)
+        a = int(np.argmax(dist))
+        dist, predecessors = bfs(graph, a, return_predecessors=True)
+        b = int(np.argmax(dist))
+        lower_bound = max(lower_bound, int(dist[b]))
+
+        # Walk back from b to the middle of the a-b path
+        node = b
+        for _ in range(int(dist[b]) // 2):
+            node = predecessors[node]
+        start = int(node)
+
+    return start, lower_bound
+
+def ifub_diameter(graph, batch_size=256):
+    """
+    Exact diameter of a connected CSRGraph with iFUB (Crescenzi et al. 2013).
+
+    A BFS from a central root splits nodes into distance levels. Levels are
+    checked from the farthest inward, with one BFS per node of the level,
+    and the search stops as soon as the best eccentricity found beats twice
+    the remaining level depth. On real networks this touches a small
+    fraction of the nodes. Returns (diameter, number of BFS runs).
+    """
+    if graph.n_nodes <= 1:
+        return 0, 0
+
+    root, lower_bound = four_sweep(graph)
+    levels = bfs(graph, root)
+    root_eccentricity = int(levels.max())
+    lower_bound = max(lower_bound, root_eccentricity)
+    upper_bound = 2 * root_eccentricity
+    n_bfs = 5
+
+    i = root_eccentricity
+    while upper_bound > lower_bound and i > 0:
+        fringe = np.flatnonzero(levels == i)
+        fringe_eccentricity = 0
+        for start in range(0, len(fringe), batch_size):
+            dist = bfs(graph, fringe[start:start + batch_size])
+            fringe_eccentricity = max(fringe_eccentricity, int(dist.max()))
+        n_bfs += len(fringe)
+
+        if max(lower_bound, fringe_eccentricity) > 2 * (i - 1):
+            return max(lower_bound, fringe_eccentricity), n_bfs
+        lower_bound = max(lower_bound, fringe_eccentricity)
+        upper_bound = 2 * (i - 1)
+        i -= 1
+
+    return lower_bound, n_bfs
+
+def sampled_average_path_length(graph, n_samples=200, confidence=0.95, seed=0, batch_size=256):
+    """
+    Average shortest path length of a connected CSRGraph estimated from BFS
+    runs out of n_samples random sources (all nodes if the graph is smaller,
+    giving the exact value). Every source's mean distance to the other nodes
+    is an unbiased sample of the average. Returns (estimate, standard_error,
+    ci_half_width, sources).
+    """
+    n = graph.n_nodes
+    if n <= 1:
+        return 0.0, 0.0, 0.0, 0
+
+    k = min(n, n_samples)
+    sources = np.random.default_rng(seed).choice(n, size=k, replace=False)
+    means = np.concatenate([
+        bfs(graph, sources[start:start + batch_size]).sum(axis=1) / (n - 1)
+        for start in range(0, k, batch_size)
+    ])
+
+    estimate = float(means.mean())
+    if k < 2:
+        return estimate, np.inf, np.inf, k
+    fpc = np.sqrt((n - k) / (n - 1))
+    standard_error = float(means.std(ddof=1) / np.sqrt(k) * fpc)
+    return estimate, standard_error, float(norm.ppf(0.5 + confidence / 2) * standard_error), k
+
+def path_metrics(graph, n_samples=200, seed=0):
+    """
+    Diameter (exact, iFUB) and average path length (sampled, with standard
+    error) of the largest connected component, as one metrics-table row
+    """
+    gcc = largest_component(graph) if graph.n_nodes else graph
+    diameter, diameter_bfs = ifub_diameter(gcc)
+    avg_path_length, standard_error, _, sources = sampled_average_path_length(gcc, n_samples,
+                                                                               seed=seed)
+    return {
+        'largest_component_size': gcc.n_nodes,
+        'diameter': diameter,
+        'diameter_bfs': diameter_bfs,
+        'avg_path_length': avg_path_length,
+        'avg_path_length_se': standard_error,
+        'avg_path_length_sources': sources,
+    }
@@ -0,0 +1,18 @@
+# Period boundaries shared by every stage of the pipeline. Change them here
+# (or pass custom ranges to TemporalEdgeStore.window) instead of editing
+# each script.
+PERIOD_DATES = {
+    'pre_crimea': ('2010-01-01', '2013-10-31'),
+    'post_crimea': ('2013-11-01', '2019-12-31'),
+    'covid': ('2020-01-01', '2022-01-31'),
+    'war': ('2022-02-01', '2025-06-29')
+}
+
+PERIOD_LABELS = {
+    'pre_crimea': 'Pre-Crimea (2010-2013)',
+    'post_crimea': 'Post-Crimea (2013-2019)',
+    'covid': 'COVID Period (2020-2022)',
+    'war': 'War Period (2022-2025)'
+}
+
+PERIODS = list(PERIOD_DATES.keys())
@@ -0,0 +1,106 @@
+import pandas as pd
+import numpy as np
+import os
+from csr_graph import CSRGraph
+from multiseed import label_modularity, run_community_tasks
+from partition_similarity import normalized_mutual_info
+
+DEFAULT_RESOLUTIONS = np.round(np.arange(0.2, 3.01, 0.2), 2)
+
+def sweep_resolutions(graph, resolutions=None, n_workers=None, method='louvain', seed=0):
+    """
+    Cluster one CSRGraph at every resolution of the grid in parallel. The
+    graph is converted once and shipped to each worker once; all resolutions
+    are tasks of the same pool.
+
+    Returns (table, labels): one row per resolution with the community count,
+    modularity at that resolution, standard (resolution 1) modularity and the
+    NMI with the previous resolution's partition, plus the label arrays.
+    """
+    if resolutions is None:
+        resolutions = DEFAULT_RESOLUTIONS
+    resolutions = sorted(float(r) for r in resolutions)
+
+    labels = run_community_tasks(graph, [(seed, r, None) for r in resolutions],
+                                 n_workers, method)
+
+    rows = []
+    for i, (resolution, run) in enumerate(zip(resolutions, labels)):
+        rows.append({
+            'resolution': resolution,
+            'communities': len(np.unique(run)),
+            'modularity': label_modularity(graph, run, resolution),
+            'standard_modularity': label_modularity(graph, run),
+            'nmi_previous': normalized_mutual_info(labels[i - 1], run) if i > 0 else np.nan
+        })
+
+    return pd.DataFrame(rows), labels
+
+def find_plateaus(table, min_nmi=0.9):
+    """
+    Runs of adjacent resolutions whose partitions agree with the previous
+    one at NMI >= min_nmi, as (first_resolution, last_resolution, length)
+    rows ordered longest first
+    """
+    stable = (table['nmi_previous'] >= min_nmi).values
+    plateaus = []
+    start = None
+    for i in range(1, len(table) + 1):
+        if i < len(table) and stable[i]:
+            if start is None:
+                start = i - 1
+        elif start is not None:
+            plateaus.append({
+                'first_resolution': table['resolution'].iloc[start],
+                'last_resolution': table['resolution'].iloc[i - 1],
+                'length': i - start,
+                'communities': int(table['communities'].iloc[start:i].median())
+            })
+            start = None
+
+    return pd.DataFrame(plateaus, columns=['first_resolution', 'last_resolution',
+                                           'length', 'communities']
+                        ).sort_values('length', ascending=False, kind='stable')
+
+def sweep_periods(periods=None, resolutions=None, n_workers=None, method='louvain',
+                  weight='weight'):
+    """
+    Resolution sweep over each period's {period}_edges.csv, written as one
+    table to resolution_sweep.csv
+    """
+    if periods is None:
+        periods = ['pre_crimea', 'post_crimea', 'covid', 'war']
+
+    tables = []
+    for period in periods:
+        edges_file = f"{period}_edges.csv"
+        if not os.path.exists(edges_file):
+            print(f"Skipping {period}: {edges_file} not found")
+            continue
+
+        graph = CSRGraph.from_edges(pd.read_csv(edges_file), weight=weight)
+        if graph.n_edges == 0:
+            print(f"Skipping {period}: no edges")
+            continue
+
+        table, _ = sweep_resolutions(graph, resolutions, n_workers, method)
+        table.insert(0, 'period', period)
+        tables.append(table)
+
+        plateaus = find_plateaus(table)
+        print(f"\n{period.upper()}: {graph.n_nodes} nodes, {graph.n_edges} edges")
+        print(table.drop(columns='period').to_string(index=False))
+        if not plateaus.empty:
+            best = plateaus.iloc[0]
+            print(f"Longest stable plateau: resolution {best['first_resolution']}-"
+                  f"{best['last_resolution']} (~{int(best['communities'])} communities)")
+
+    sweep_df = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+    if not sweep_df.empty:
+        sweep_df.to_csv("resolution_sweep.csv", index=False)
+        print("\nSaved resolution sweep to resolution_sweep.csv")
+
+    return sweep_df
+
+if __name__ == "__main__":
+    sweep_periods()
@@ -7,6 +7,16 @@ import os
 import json
 import re
 from datetime import datetime, date
+from cooccurrence import cooccurrence_edges
+from entity_vocab import EntityVocabulary
+from periods import PERIOD_DATES, PERIOD_LABELS
+from backbone import extract_backbone
+from community_backends import detect_networkx_communities
+from centrality import networkx_centrality
+from csr_graph import CSRGraph
+from brokerage import GOULD_FERNANDEZ_ROLES, brokerage_table
+from kcore import onion_decomposition
+from cache import MetricsCache
 warnings.filterwarnings('ignore')
 
 class EnhancedNetworkAnalyzer:
@@ -16,20 +26,19 @@ class EnhancedNetworkAnalyzer:
         self.min_edge_weight = 2
         self.max_edges_per_period = 800  # Increased to handle more nodes
         
+        # Community detection backend: 'louvain', 'leiden' or 'networkx'
+        self.community_method = 'networkx'
+        self.community_resolution = 1.0  # pick a plateau from resolution_sweep.py
+        
+        # Max 95% CI half-width of the sampled betweenness/closeness
+        self.centrality_epsilon = 0.01
+        
+        # Partitions and centralities keyed by a hash of the edge list
+        self.metrics_cache = MetricsCache('.metrics_cache')
+        
         # Date ranges for periods
-        self.period_dates = {
-            'pre_crimea': ('2010-01-01', '2013-10-31'),
-            'post_crimea': ('2013-11-01', '2019-12-31'),
-            'covid': ('2020-01-01', '2022-01-31'),
-            'war': ('2022-02-01', '2025-06-29')
-        }
-        
-        self.period_labels = {
-            'pre_crimea': 'Pre-Crimea (2010-2013)',
-            'post_crimea': 'Post-Crimea (2013-2019)', 
-            'covid': 'COVID Period (2020-2022)',
-            'war': 'War Period (2022-2025)'
-        }
+        self.period_dates = dict(PERIOD_DATES)
+        self.period_labels = dict(PERIOD_LABELS)
         
         # Enhanced community colors for better distinction
         self.community_colors = [
@@ -185,6 +194,19 @@ class EnhancedNetworkAnalyzer:
         all_nodes = []
         all_edges = []
         
+        # One integer id per entity shared by all periods and with every other
+        # stage: the persisted vocabulary, extended in memory with any new
+        # (cleaned) names. A viewer never writes entity_vocabulary.csv back.
+        # Entity details are looked up by id and names are only resolved for
+        # the exported nodes
+        vocab = EntityVocabulary.load_if_exists()
+        if vocab is None:
+            vocab = EntityVocabulary.from_dataframe(df, 'Entity', 'entity_type', 'jurisdiction')
+        else:
+            vocab.extend_from_dataframe(df, 'Entity', 'entity_type', 'jurisdiction')
+        occurrences = df.drop_duplicates(subset=['Entity']).set_index('Entity')['occurrences']
+        entity_occurrences = occurrences.reindex(vocab.names).fillna(0).astype(int).values
+        
         for period in self.period_dates.keys():
             period_df = df[df['period'] == period].copy()
             
@@ -194,90 +216,94 @@ class EnhancedNetworkAnalyzer:
             
             print(f"Processing {period}: {len(period_df)} rows")
             
-            # Create co-occurrence network
-            edges_list = []
-            entity_details = {}
+            # Create co-occurrence network on entity ids, using every entity
+            # of every article
+            edges_df = cooccurrence_edges(period_df, 'Article_ID', 'Entity',
+                                          vocab=vocab, resolve_names=False)
             
-            for article_id, group in period_df.groupby('Article_ID'):
-                entities = group['Entity'].unique().tolist()
-                if len(entities) < 2:
-                    continue
-                
-                # Store entity details
-                for _, row in group.iterrows():
-                    entity = row['Entity']
-                    if entity not in entity_details:
-                        entity_details[entity] = {
-                            'jurisdiction': row['jurisdiction'],
-                            'entity_type': row['entity_type'],
-                            'occurrences': row['occurrences'],
-                            'is_russian': self.is_russian_actor(row['jurisdiction'])
-                        }
-                
-                # Limit entities per article for performance
-                if len(entities) > 20:
-                    entities = entities[:20]
-                
-                # Create entity pairs for co-occurrence
-                for i, entity1 in enumerate(entities):
-                    for entity2 in entities[i+1:]:
-                        if entity1 != entity2:
-                            edge = tuple(sorted([entity1, entity2]))
-                            edges_list.append(edge)
-            
-            if not edges_list:
+            if edges_df.empty:
                 print(f"No co-occurrences found for {period}")
                 continue
             
-            # Count edge frequencies and filter
-            edge_counts = Counter(edges_list)
+            # Core and onion layer of every entity in the full period graph
+            full_graph = CSRGraph.from_edges(edges_df)
+            core, layer = onion_decomposition(full_graph)
+            node_core = dict(zip(full_graph.nodes.tolist(), core.tolist()))
+            node_layer = dict(zip(full_graph.nodes.tolist(), layer.tolist()))
+            
+            # Rank edges by disparity-filter significance on the full graph,
+            # then keep the most salient ones within the edge budget
+            edges_df = extract_backbone(edges_df)
+            edges_df = edges_df[edges_df['weight'] >= self.min_edge_weight]
+            edges_df = edges_df.head(self.max_edges_per_period)
+            
             filtered_edges = [
-                {'from': edge[0], 'to': edge[1], 'weight': count, 'period': period}
-                for edge, count in edge_counts.items()
-                if count >= self.min_edge_weight
+                {'from': int(src), 'to': int(dst), 'weight': int(weight), 'period': period}
+                for src, dst, weight in zip(edges_df['src'].values,
+                                            edges_df['dst'].values,
+                                            edges_df['weight'].values)
             ]
             
-            # Limit edges for performance
-            if len(filtered_edges) > self.max_edges_per_period:
-                filtered_edges = sorted(filtered_edges, 
-                                      key=lambda x: x['weight'], 
-                                      reverse=True)[:self.max_edges_per_period]
-            
             # Create graph
             G = nx.Graph()
             for edge in filtered_edges:
                 G.add_edge(edge['from'], edge['to'], weight=edge['weight'])
             
-            # Enhanced community detection
+            # Communities and centralities, cached by graph content so an
+            # unchanged period is not recomputed on the next run. Fallbacks
+            # are applied outside the cache so they are never stored.
+            def compute_communities():
+                communities = detect_networkx_communities(G, self.community_method,
+                                                          resolution=self.community_resolution, seed=42)
+                return {'community': {node: i for i, community in enumerate(communities)
+                                      for node in community}}
+            
             try:
-                import networkx.algorithms.community as nx_comm
-                communities = list(nx_comm.louvain_communities(G, seed=42, resolution=1.0))
-            except:
-                communities = list(nx.connected_components(G))
-            
-            # Create community mapping
-            community_map = {}
-            for i, community in enumerate(communities):
-                for node in community:
-                    community_map[node] = i
-            
-            # Calculate centrality measures with optimization for larger networks
+                community_map = self.metrics_cache.node_metrics(
+                    G, 'singlehtml4_communities', compute_communities, method=self.community_method,
+                    resolution=self.community_resolution, seed=42)['community']
+            except Exception as e:
+                print(f"Community detection failed ({e}), using connected components")
+                community_map = {node: i for i, component in enumerate(nx.connected_components(G))
+                                 for node in component}
+            
+            # Sample sources until betweenness and closeness are within the error bound
+            def compute_centrality():
+                betweenness, closeness, betweenness_ci = networkx_centrality(
+                    G, epsilon=self.centrality_epsilon)
+                return {'betweenness': betweenness, 'closeness': closeness,
+                        'betweenness_ci': betweenness_ci}
+            
             try:
-                centrality = nx.degree_centrality(G)
-                # Sample nodes for betweenness calculation to improve performance
-                sample_size = min(100, len(G.nodes()))
-                betweenness = nx.betweenness_centrality(G, k=sample_size)
-                closeness = nx.closeness_centrality(G)
-            except:
-                centrality = {node: G.degree(node) / len(G.nodes()) for node in G.nodes()}
+                metrics = self.metrics_cache.node_metrics(
+                    G, 'singlehtml4_centrality', compute_centrality, epsilon=self.centrality_epsilon)
+                betweenness = metrics['betweenness']
+                closeness = metrics['closeness']
+                betweenness_ci = metrics['betweenness_ci']
+            except Exception as e:
+                print(f"Centrality failed ({e}), using zero betweenness and closeness")
                 betweenness = {node: 0 for node in G.nodes()}
                 closeness = {node: 0 for node in G.nodes()}
+                betweenness_ci = {node: 0 for node in G.nodes()}
+            
+            try:
+                centrality = nx.degree_centrality(G)
+            except Exception as e:
+                print(f"Degree centrality failed ({e}), using degree / n")
+                centrality = {node: G.degree(node) / len(G.nodes()) for node in G.nodes()}
+            
+            # Brokerage: Burt's structural holes plus Gould-Fernandez roles
+            # across jurisdictions
+            graph = CSRGraph.from_networkx(G)
+            brokerage = brokerage_table(
+                graph, vocab.attribute('Jurisdiction', graph.nodes.astype(np.int64)))
             
             # Create enhanced node objects
             for node in G.nodes():
                 degree = G.degree(node)
                 community = community_map.get(node, 0)
-                details = entity_details.get(node, {})
+                name = vocab.names[node]
+                jurisdiction = vocab.attribute('Jurisdiction', node)
                 
                 # Calculate importance
                 cent = centrality.get(node, 0)
@@ -289,37 +315,45 @@ class EnhancedNetworkAnalyzer:
                 size = max(15, min(45, 15 + importance * 150 + degree * 1.5))
                 
                 all_nodes.append({
-                    'id': f"{period}_{node}",
-                    'label': str(node),
-                    'original_label': str(node),
+                    'id': f"{period}_{name}",
+                    'label': str(name),
+                    'original_label': str(name),
                     'period': period,
                     'community': community,
                     'global_community': f"{period}_{community}",
                     'degree': degree,
                     'centrality': round(cent, 4),
                     'betweenness': round(betw, 4),
+                    'betweenness_ci': round(betweenness_ci.get(node, 0), 4),
                     'closeness': round(clos, 4),
                     'importance': round(importance, 4),
+                    'constraint': round(float(brokerage.at[node, 'constraint']), 4),
+                    'effective_size': round(float(brokerage.at[node, 'effective_size']), 4),
+                    'hierarchy': round(float(brokerage.at[node, 'hierarchy']), 4),
+                    'brokerage_roles': {role: int(brokerage.at[node, role])
+                                        for role in GOULD_FERNANDEZ_ROLES},
+                    'core': node_core[node],
+                    'layer': node_layer[node],
                     'size': int(size),
                     'color': self.get_community_color(community),
-                    'jurisdiction': details.get('jurisdiction', 'Unknown'),
-                    'entity_type': details.get('entity_type', 'Unknown'),
-                    'occurrences': details.get('occurrences', 0),
-                    'is_russian': details.get('is_russian', False)
+                    'jurisdiction': jurisdiction,
+                    'entity_type': vocab.attribute('Entity_Type', node),
+                    'occurrences': int(entity_occurrences[node]),
+                    'is_russian': self.is_russian_actor(jurisdiction)
                 })
             
             # Create edge objects - ALL GREY initially
             for edge in filtered_edges:
                 all_edges.append({
-                    'from': f"{period}_{edge['from']}",
-                    'to': f"{period}_{edge['to']}",
+                    'from': f"{period}_{vocab.names[edge['from']]}",
+                    'to': f"{period}_{vocab.names[edge['to']]}",
                     'weight': edge['weight'],
                     'period': period,
                     'width': max(1, min(8, edge['weight'] // 3)),
                     'color': '#95a5a6'  # ALL EDGES GREY
                 })
             
-            print(f"✅ {period}: {len(G.nodes())} nodes, {len(filtered_edges)} edges, {len(communities)} communities")
+            print(f"✅ {period}: {len(G.nodes())} nodes, {len(filtered_edges)} edges, {len(set(community_map.values()))} communities")
         
         return all_nodes, all_edges
     
@@ -0,0 +1,212 @@
+import pandas as pd
+import numpy as np
+import os
+from cooccurrence import code_mentions
+from periods import PERIOD_DATES
+
+
+def to_day(value):
+    """Days since 1970-01-01 for a date string or timestamp"""
+    return int(np.datetime64(pd.Timestamp(value), 'D').astype(np.int64))
+
+def article_pairs(article_codes, entity_codes):
+    """
+    Expand integer-coded mentions into one (article, src, dst) row per entity
+    pair of each article, with src < dst. Articles are processed in batches
+    of equal size so each batch is a single triu_indices gather.
+    """
+    mentions = np.unique((article_codes.astype(np.int64) << 32) | entity_codes.astype(np.int64))
+    articles = (mentions >> 32).astype(np.int32)
+    entities = (mentions & 0xFFFFFFFF).astype(np.int32)
+
+    starts = np.flatnonzero(np.r_[True, articles[1:] != articles[:-1]])
+    sizes = np.diff(np.r_[starts, len(articles)])
+
+    pair_articles, pair_src, pair_dst = [], [], []
+    for size in np.unique(sizes[sizes > 1]):
+        batch_starts = starts[sizes == size]
+        rows = entities[batch_starts[:, None] + np.arange(size)]
+        i, j = np.triu_indices(size, k=1)
+        pair_articles.append(np.repeat(articles[batch_starts], len(i)))
+        pair_src.append(rows[:, i].ravel())
+        pair_dst.append(rows[:, j].ravel())
+
+    if not pair_src:
+        empty = np.empty(0, dtype=np.int32)
+        return empty, empty, empty
+
+    return np.concatenate(pair_articles), np.concatenate(pair_src), np.concatenate(pair_dst)
+
+
+class TemporalEdgeStore:
+    """
+    Every co-occurrence contribution kept with its article date, sorted by
+    day. A [start, end] window graph is two binary searches plus one
+    bincount over the contributions inside the window, so alternative
+    period boundaries can be tried without re-splitting the node file.
+
+    Contributions reference a table of unique entity pairs (pair_src,
+    pair_dst) instead of carrying both entity ids, which keeps the store
+    compact and makes window aggregation a single np.bincount.
+    """
+
+    def __init__(self, days, pair_ids, pair_src, pair_dst, entity_names):
+        self.days = days
+        self.pair_ids = pair_ids
+        self.pair_src = pair_src
+        self.pair_dst = pair_dst
+        self.entity_names = np.asarray(entity_names, dtype=object)
+
+    @classmethod
+    def from_nodes(cls, df, vocab=None, article_col='Article_ID', entity_col='Entity',
+                   date_col='Date'):
+        """Build the store from a node table with one row per entity mention"""
+        df = df.dropna(subset=[article_col, entity_col])
+        if vocab is not None:
+            df = df[vocab.encode(df[entity_col].values) >= 0]
+
+        # One date per article, taken from its first mention
+        dates = pd.to_datetime(df[date_col], errors='coerce')
+        df = df[dates.notna()]
+        dates = dates[dates.notna()]
+
+        article_codes, entity_codes, n_articles, entity_names = code_mentions(
+            df, article_col, entity_col, vocab)
+        article_days = np.zeros(n_articles, dtype=np.int32)
+        mention_days = dates.values.astype('datetime64[D]').astype(np.int32)
+        article_days[article_codes[::-1]] = mention_days[::-1]
+
+        articles, src, dst = article_pairs(article_codes, entity_codes)
+        days = article_days[articles]
+
+        # Unique pair table; contributions keep only an index into it
+        keys = (src.astype(np.int64) << 32) | dst.astype(np.int64)
+        unique_keys, pair_ids = np.unique(keys, return_inverse=True)
+
+        order = np.argsort(days, kind='stable')
+        return cls(days[order], pair_ids[order].astype(np.int32),
+                   (unique_keys >> 32).astype(np.int32),
+                   (unique_keys & 0xFFFFFFFF).astype(np.int32),
+                   entity_names)
+
+    @classmethod
+    def load(cls, path='temporal_edges.npz'):
+        data = np.load(path, allow_pickle=True)
+        return cls(data['days'], data['pair_ids'], data['pair_src'], data['pair_dst'],
+                   data['entity_names'])
+
+    def save(self, path='temporal_edges.npz'):
+        np.savez_compressed(path, days=self.days, pair_ids=self.pair_ids,
+                            pair_src=self.pair_src, pair_dst=self.pair_dst,
+                            entity_names=self.entity_names)
+
+    @property
+    def n_pairs(self):
+        return len(self.pair_src)
+
+    def window_slice(self, start, end):
+        """Index range of the contributions dated within [start, end]"""
+        lo = np.searchsorted(self.days, to_day(start), side='left')
+        hi = np.searchsorted(self.days, to_day(end), side='right')
+        return lo, hi
+
+    def window_weights(self, start, end):
+        """Weight of every pair in the pair table for the [start, end] window"""
+        lo, hi = self.window_slice(start, end)
+        return np.bincount(self.pair_ids[lo:hi], minlength=self.n_pairs)
+
+    def edges_from_weights(self, weights, min_weight=1, resolve_names=True):
+        """src,dst,weight DataFrame for the pairs whose weight is >= min_weight"""
+        keep = np.flatnonzero(weights >= max(min_weight, 1))
+        src = self.pair_src[keep]
+        dst = self.pair_dst[keep]
+        return pd.DataFrame({
+            'src': self.entity_names[src] if resolve_names else src,
+            'dst': self.entity_names[dst] if resolve_names else dst,
+            'weight': weights[keep].astype(np.int64)
+        })
+
+    def window(self, start, end, min_weight=1, resolve_names=True):
+        """Co-occurrence edge list of all articles dated within [start, end]"""
+        return self.edges_from_weights(self.window_weights(start, end), min_weight, resolve_names)
+
+    def period_edges(self, period_dates=None, min_weight=1):
+        """Edge list for each named period, {period: edges_df}"""
+        if period_dates is None:
+            period_dates = PERIOD_DATES
+        return {
+            period: self.window(start, end, min_weight)
+            for period, (start, end) in period_dates.items()
+        }
+
+    def rolling_windows(self, start='2010-01-01', end='2025-06-29', window_months=12,
+                        step_months=1, min_weight=1, resolve_names=True):
+        """
+        Yield (window_start, window_end, edges_df) for sliding windows of
+        window_months calendar months stepping by step_months. Each window's
+        weights are derived from the previous one by adding the pair counts
+        of the entering months and subtracting those of the leaving months.
+        """
+        month_starts = pd.date_range(pd.Timestamp(start).to_period('M').to_timestamp(),
+                                     end, freq='MS')
+        n_months = len(month_starts)
+        if n_months < window_months:
+            return
+
+        # Contribution index range of every month
+        boundaries = month_starts.append(pd.DatetimeIndex([month_starts[-1] + pd.DateOffset(months=1)]))
+        month_days = np.array([to_day(b) for b in boundaries])
+        bounds = np.searchsorted(self.days, month_days, side='left')
+
+        weights = np.zeros(self.n_pairs, dtype=np.int64)
+        prev_first, prev_last = 0, 0  # months [prev_first, prev_last) are counted
+
+        for first in range(0, n_months - window_months + 1, step_months):
+            last = first + window_months
+
+            # Leaving months
+            leave_to = min(prev_last, first)
+            if leave_to > prev_first:
+                np.subtract.at(weights, self.pair_ids[bounds[prev_first]:bounds[leave_to]], 1)
+
+            # Entering months
+            enter_from = max(prev_last, first)
+            if last > enter_from:
+                np.add.at(weights, self.pair_ids[bounds[enter_from]:bounds[last]], 1)
+
+            prev_first, prev_last = first, last
+
+            window_start = month_starts[first]
+            window_end = boundaries[last] - pd.Timedelta(days=1)
+            yield window_start, window_end, self.edges_from_weights(weights, min_weight, resolve_names)
+
+def write_rolling_series(store, output_dir='rolling_windows', **window_args):
+    """
+    Write one {window_start}_edges.csv per rolling window and a summary of
+    node and edge counts per window to rolling_windows_summary.csv
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    summary = []
+
+    for window_start, window_end, edges_df in store.rolling_windows(**window_args):
+        label = window_start.strftime('%Y-%m')
+        edges_df.to_csv(os.path.join(output_dir, f"{label}_edges.csv"), index=False)
+        summary.append({
+            'window': label,
+            'start': window_start.date(),
+            'end': window_end.date(),
+            'nodes': len(np.union1d(edges_df['src'].values, edges_df['dst'].values)),
+            'edges': len(edges_df),
+            'total_weight': int(edges_df['weight'].sum())
+        })
+
+    summary_df = pd.DataFrame(summary)
+    summary_df.to_csv(os.path.join(output_dir, "rolling_windows_summary.csv"), index=False)
+    print(f"Wrote {len(summary_df)} rolling window graphs to {output_dir}/")
+    return summary_df
+
+# Build the store from final_nodes.csv and emit 12-month windows stepping monthly
+if __name__ == "__main__":
+    store = TemporalEdgeStore.from_nodes(pd.read_csv("final_nodes.csv"))
+    store.save()
+    write_rolling_series(store, window_months=12, step_months=1)
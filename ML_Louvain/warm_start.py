@@ -0,0 +1,51 @@
+import numpy as np
+
+
+def initial_labels(graph, previous_partition):
+    """
+    Warm-start labels for a CSRGraph from the previous window's
+    {node: community} partition. Surviving nodes keep their community; new
+    nodes start as singletons. Returns (initial, previous) int32 arrays
+    aligned to graph.nodes: initial is renumbered 0..k-1 for the backends,
+    previous holds the old community ids with -1 for new nodes.
+    """
+    previous = np.fromiter((previous_partition.get(node, -1) for node in graph.nodes.tolist()),
+                           dtype=np.int64, count=graph.n_nodes)
+
+    seeded = previous.copy()
+    new_nodes = np.flatnonzero(previous < 0)
+    seeded[new_nodes] = previous.max(initial=-1) + 1 + np.arange(len(new_nodes))
+
+    _, initial = np.unique(seeded, return_inverse=True)
+    return initial.astype(np.int32), previous.astype(np.int32)
+
+def align_to_previous(labels, previous, max_id=-1):
+    """
+    Relabel communities so they keep the id of the previous-window community
+    they overlap most, matched greedily by shared node count. Communities
+    with no match get fresh ids above max_id (the largest id ever handed
+    out, including communities whose members all left) and above every
+    surviving previous id, so ids are never reused over consecutive windows.
+    """
+    survived = previous >= 0
+    pairs, overlap = np.unique(np.column_stack([labels[survived], previous[survived]]),
+                               axis=0, return_counts=True)
+
+    mapping = {}
+    used_previous = set()
+    for idx in np.argsort(-overlap, kind='stable'):
+        new, old = int(pairs[idx, 0]), int(pairs[idx, 1])
+        if new not in mapping and old not in used_previous:
+            mapping[new] = old
+            used_previous.add(old)
+
+    next_id = max(int(max_id), int(previous.max(initial=-1))) + 1
+    for new in np.unique(labels).tolist():
+        if new not in mapping:
+            mapping[new] = next_id
+            next_id += 1
+
+    lookup = np.zeros(int(labels.max()) + 1, dtype=np.int32)
+    for new, old in mapping.items():
+        lookup[new] = old
+    return lookup[labels]
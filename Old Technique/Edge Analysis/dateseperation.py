@@ -1,5 +1,10 @@
 import pandas as pd
 from datetime import datetime
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'ML_Louvain'))
+from periods import PERIOD_DATES
 
 # Load the dataset
 df = pd.read_csv('matched_entities_filtered.csv')
@@ -60,13 +65,8 @@ if failed_count > 0:
     for i, date in enumerate(failed_dates):
         print(f"  {i+1}: '{date}'")
 
-# Define date ranges for each period
-periods = {
-    'Pre-Crimea': ('2010-01-01', '2013-10-31'),
-    'Post-Crimea': ('2013-11-01', '2019-12-31'),
-    'Covid': ('2020-01-01', '2022-01-31'),
-    'War': ('2022-02-01', '2025-06-29')
-}
+# Date ranges for each period, shared with the rest of the pipeline
+periods = PERIOD_DATES
 
 # Create and save datasets for each period
 total_distributed = 0
@@ -3,25 +3,41 @@ import networkx as nx
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
-from itertools import combinations
-from collections import defaultdict, Counter
+from collections import defaultdict
 import warnings
+import os
+import sys
 warnings.filterwarnings('ignore')
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'ML_Louvain'))
+from cooccurrence import cooccurrence_edges, parallel_cooccurrence_edges
+from entity_vocab import EntityVocabulary
+from csr_graph import CSRGraph
+from centrality import fused_metrics
+from path_bounds import largest_component, path_metrics
+from spectral import eigenvector_centrality
+from persistence import PresenceMatrix
+from brokerage import brokerage_table
+
 # Set up plotting parameters
 plt.rcParams['figure.figsize'] = (12, 8)
 plt.rcParams['font.size'] = 10
 sns.set_style("whitegrid")
 
 class NetworkAnalyzer:
-    def __init__(self, datasets):
+    def __init__(self, datasets, vocab=None, n_workers=None):
         """
-        Initialize with dictionary of datasets for each time period
+        Initialize with dictionary of datasets for each time period.
+        n_workers > 1 counts co-occurrences on article shards in parallel.
         """
         self.datasets = datasets
+        self.vocab = vocab
+        self.n_workers = n_workers
         self.networks = {}
         self.edge_data = {}
         self.node_data = {}
+        self.node_metrics = {}
+        self.presence = None
         
     def create_co_occurrence_edges(self, df, period_name):
         """
@@ -29,31 +45,18 @@ class NetworkAnalyzer:
         """
         print(f"Creating co-occurrence edges for {period_name}...")
         
-        # Group by Article_ID to get entities that co-occur
-        article_groups = df.groupby('Article_ID')['Entity'].apply(list).reset_index()
-        
-        # Generate all pairwise combinations of entities within each article
-        edges = []
-        for _, row in article_groups.iterrows():
-            entities = row['Entity']
-            if len(entities) > 1:  # Only create edges if more than one entity
-                # Generate all combinations of entity pairs
-                for entity1, entity2 in combinations(entities, 2):
-                    if entity1 != entity2:  # Avoid self-loops
-                        edges.append((entity1, entity2))
-        
-        # Count co-occurrences
-        edge_counts = Counter(edges)
-        
-        # Create edge list with weights
-        edge_list = []
-        for (entity1, entity2), weight in edge_counts.items():
-            edge_list.append({
-                'source': entity1,
-                'target': entity2,
-                'weight': weight,
-                'period': period_name
-            })
+        # Every pair of mentions within an article counts once, so weights are
+        # the upper triangle of AᵀA over the mention-count incidence matrix.
+        # Entities are coded with the shared vocabulary ids when available.
+        if self.n_workers is not None and self.n_workers > 1:
+            edges_df = parallel_cooccurrence_edges(df, self.n_workers, 'Article_ID', 'Entity',
+                                                   binary=False, vocab=self.vocab)
+        else:
+            edges_df = cooccurrence_edges(df, 'Article_ID', 'Entity', binary=False,
+                                          vocab=self.vocab)
+        edges_df = edges_df.rename(columns={'src': 'source', 'dst': 'target'})
+        edges_df['period'] = period_name
+        edge_list = edges_df.to_dict('records')
         
         print(f"  Generated {len(edge_list)} unique edges")
         return edge_list
@@ -92,12 +95,12 @@ class NetworkAnalyzer:
             metrics['largest_component_size'] = len(largest_cc)
             metrics['largest_component_density'] = nx.density(gcc)
             
-            if len(largest_cc) > 1:
-                metrics['avg_path_length'] = nx.average_shortest_path_length(gcc)
-                metrics['diameter'] = nx.diameter(gcc)
-            else:
-                metrics['avg_path_length'] = 0
-                metrics['diameter'] = 0
+            # Exact iFUB diameter and sampled average path length (with its
+            # standard error) instead of all-pairs BFS
+            component_paths = path_metrics(CSRGraph.from_networkx(gcc))
+            metrics['avg_path_length'] = component_paths['avg_path_length']
+            metrics['avg_path_length_se'] = component_paths['avg_path_length_se']
+            metrics['diameter'] = component_paths['diameter']
         
         return metrics
     
@@ -203,17 +206,17 @@ class NetworkAnalyzer:
             if G.number_of_nodes() > 0:
                 # Calculate centralities
                 degree_cent = nx.degree_centrality(G)
-                betweenness_cent = nx.betweenness_centrality(G)
-                closeness_cent = nx.closeness_centrality(G)
+                if period_name not in self.node_metrics:
+                    self.node_metrics[period_name], _ = fused_metrics(CSRGraph.from_networkx(G),
+                                                                      n_workers=self.n_workers)
+                betweenness_cent = self.node_metrics[period_name]['betweenness'].to_dict()
+                closeness_cent = self.node_metrics[period_name]['closeness'].to_dict()
                 
-                # Only calculate eigenvector centrality if graph is connected
-                if nx.is_connected(G):
-                    eigenvector_cent = nx.eigenvector_centrality(G)
-                else:
-                    # Use largest connected component
-                    largest_cc = max(nx.connected_components(G), key=len)
-                    gcc = G.subgraph(largest_cc)
-                    eigenvector_cent = nx.eigenvector_centrality(gcc)
+                # Eigenvector centrality by sparse power iteration on the
+                # largest connected component
+                gcc = largest_component(CSRGraph.from_networkx(G))
+                eigenvector_cent = dict(zip(gcc.nodes.tolist(),
+                                            eigenvector_centrality(gcc, weighted=False)[0].tolist()))
                 
                 # Get top entities for degree centrality
                 top_entities = sorted(degree_cent.items(), key=lambda x: x[1], reverse=True)[:top_n]
@@ -243,29 +246,18 @@ class NetworkAnalyzer:
         """
         Analyze which entities persist across time periods
         """
-        # Get all entities from each period
-        period_entities = {}
-        for period_name, G in self.networks.items():
-            period_entities[period_name] = set(G.nodes())
-        
-        # Find entities that appear in multiple periods
-        all_entities = set()
-        for entities in period_entities.values():
-            all_entities.update(entities)
-        
-        # Create persistence matrix
-        persistence_data = []
-        for entity in all_entities:
-            row = {'entity': entity}
-            for period_name in period_entities.keys():
-                row[period_name] = entity in period_entities[period_name]
-            persistence_data.append(row)
-        
-        persistence_df = pd.DataFrame(persistence_data)
-        
-        # Count persistence
-        period_columns = [col for col in persistence_df.columns if col != 'entity']
-        persistence_df['periods_count'] = persistence_df[period_columns].sum(axis=1)
+        # One packed presence bit per entity and period
+        presence = PresenceMatrix.from_sets({period_name: G.nodes()
+                                             for period_name, G in self.networks.items()})
+        summary = presence.table()
+        self.presence = presence
+        
+        persistence_df = pd.DataFrame(presence.presence(), columns=presence.windows)
+        persistence_df.insert(0, 'entity', presence.entities)
+        persistence_df['periods_count'] = summary['windows_present']
+        persistence_df['first_period'] = summary['first_window']
+        persistence_df['last_period'] = summary['last_window']
+        persistence_df['longest_run'] = summary['longest_run']
         
         # Plot persistence distribution
         plt.figure(figsize=(10, 6))
@@ -346,15 +338,35 @@ class NetworkAnalyzer:
         # Export entity persistence
         persistence_df.to_csv('entity_persistence_analysis.csv', index=False)
         
+        # Packed presence bits and co-presence for the visualizers
+        if self.presence is not None:
+            self.presence.export('period_entity')
+        
         # Export edge lists for each period
         for period_name, edge_list in self.edge_data.items():
             edge_df = pd.DataFrame(edge_list)
             edge_df.to_csv(f'edges_{period_name.lower().replace("-", "_")}.csv', index=False)
         
+        # Brokerage per entity and period; Gould-Fernandez roles need the
+        # vocabulary's jurisdictions
+        for period_name, G in self.networks.items():
+            if G.number_of_nodes() == 0:
+                continue
+            graph = CSRGraph.from_networkx(G)
+            jurisdictions = None
+            if self.vocab is not None:
+                codes = self.vocab.encode(graph.nodes)
+                jurisdictions = np.where(codes >= 0, self.vocab.attribute('Jurisdiction', codes), 'Unknown')
+            brokerage = brokerage_table(graph, jurisdictions)
+            brokerage.rename_axis('entity').to_csv(
+                f'brokerage_{period_name.lower().replace("-", "_")}.csv')
+        
         print("Results exported to CSV files:")
         print("- network_metrics_by_period.csv")
         print("- entity_persistence_analysis.csv")
+        print("- period_entity_persistence.csv/.json, period_entity_copresence.csv")
         print("- edges_[period].csv for each time period")
+        print("- brokerage_[period].csv for each time period")
 
 def main():
     """
@@ -372,8 +384,9 @@ def main():
     for name, df in datasets.items():
         print(f"{name}: {len(df):,} rows, {df['Entity'].nunique():,} unique entities")
     
-    # Initialize analyzer
-    analyzer = NetworkAnalyzer(datasets)
+    # Initialize analyzer with the shared entity vocabulary, if it was built
+    vocab = EntityVocabulary.load_if_exists()
+    analyzer = NetworkAnalyzer(datasets, vocab)
     
     # 1. Analyze all periods
     print("\n1. Analyzing all time periods...")
@@ -11,8 +11,15 @@ import plotly.express as px
 from plotly.subplots import make_subplots
 import plotly.io as pio
 import warnings
+import os
+import sys
 warnings.filterwarnings('ignore')
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'ML_Louvain'))
+from centrality import networkx_centrality
+from csr_graph import CSRGraph
+from brokerage import burt_measures
+
 # Set plotly renderer to browser
 pio.renderers.default = "browser"
 
@@ -242,7 +249,7 @@ class OptimizedTemporalNetworkAnalyzer:
             
             # Calculate centrality metrics
             degree_centrality = nx.degree_centrality(G) if G.number_of_nodes() > 0 else {}
-            betweenness_centrality = nx.betweenness_centrality(G) if G.number_of_nodes() > 0 else {}
+            betweenness_centrality = networkx_centrality(G)[0] if G.number_of_nodes() > 0 else {}
             edge_count = dict(G.degree())
             
             # Proper normalization
@@ -333,7 +340,8 @@ class OptimizedTemporalNetworkAnalyzer:
             
             # Calculate centrality metrics
             degree_centrality = nx.degree_centrality(G) if G.number_of_nodes() > 0 else {}
-            betweenness_centrality = nx.betweenness_centrality(G) if G.number_of_nodes() > 0 else {}
+            betweenness_centrality = networkx_centrality(G)[0] if G.number_of_nodes() > 0 else {}
+            brokerage = burt_measures(CSRGraph.from_networkx(G)) if G.number_of_nodes() > 0 else None
             edge_count = dict(G.degree())
             
             for node in G.nodes():
@@ -342,9 +350,11 @@ class OptimizedTemporalNetworkAnalyzer:
                 degree_cent = degree_centrality.get(node, 0)
                 betweenness_cent = betweenness_centrality.get(node, 0)
                 edges = edge_count.get(node, 0)
+                constraint = brokerage.at[node, 'constraint']
+                effective_size = brokerage.at[node, 'effective_size']
                 
                 composite_score = 0.4*degree_cent + 0.3*betweenness_cent + 0.3*(edges/max(edge_count.values()) if edge_count.values() else 1)
-                text = f"<b>{node}</b><br>Period: {period_name}<br>Type: {entity_type}<br>Occurrences: {occurrences}<br>Degree: {degree_cent:.3f}<br>Betweenness: {betweenness_cent:.3f}<br>Edges: {edges}<br>Score: {composite_score:.3f}"
+                text = f"<b>{node}</b><br>Period: {period_name}<br>Type: {entity_type}<br>Occurrences: {occurrences}<br>Degree: {degree_cent:.3f}<br>Betweenness: {betweenness_cent:.3f}<br>Edges: {edges}<br>Constraint: {constraint:.3f}<br>Effective size: {effective_size:.1f}<br>Score: {composite_score:.3f}"
                 node_text.append(text)
                 
                 # Smaller node sizes
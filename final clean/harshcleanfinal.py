@@ -1,4 +1,9 @@
 import pandas as pd
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ML_Louvain'))
+from entity_vocab import EntityVocabulary
 
 def create_final_nodes_dataset():
     """
@@ -79,6 +84,13 @@ def create_final_nodes_dataset():
         print(f"The final dataset contains {len(df_final)} rows and {len(df_final.columns)} columns.")
     except Exception as e:
         print(f"An error occurred while saving the file: {e}")
+        return
+
+    # Step 7: Build the shared entity vocabulary used by every downstream stage
+    vocab_filename = 'entity_vocabulary.csv'
+    vocab = EntityVocabulary.from_dataframe(df_final)
+    vocab.save(vocab_filename)
+    print(f"Entity vocabulary with {len(vocab)} entities saved as '{vocab_filename}'.")
 
 if __name__ == "__main__":
     create_final_nodes_dataset()
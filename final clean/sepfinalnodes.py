@@ -1,4 +1,9 @@
 import pandas as pd
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ML_Louvain'))
+from periods import PERIOD_DATES
 
 def split_dataset_by_periods(csv_file_path):
     # Load your nodes dataset
@@ -7,12 +12,10 @@ def split_dataset_by_periods(csv_file_path):
     # Convert Date column to datetime
     df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
     
-    # Define period boundaries
+    # Shared period boundaries
     periods = {
-        'pre_crimea': (pd.to_datetime("2010-01-01"), pd.to_datetime("2013-10-31")),
-        'post_crimea': (pd.to_datetime("2013-11-01"), pd.to_datetime("2019-12-31")),
-        'covid': (pd.to_datetime("2020-01-01"), pd.to_datetime("2022-01-31")),
-        'war': (pd.to_datetime("2022-02-01"), pd.to_datetime("2025-06-29"))
+        name: (pd.to_datetime(start), pd.to_datetime(end))
+        for name, (start, end) in PERIOD_DATES.items()
     }
     
     # Split and save each period